@@ -0,0 +1,642 @@
+import re
+import sqlite3
+import time
+import sys
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import init_db
+import embed_parser
+from init_db import bulk_upsert
+from data_loader import FeedPager, FrameCache
+from table_utils import compile_filters, apply_filters
+from table_format import format_table_columns, TableRenderer
+from wallet_config import apply_wallet_config, wallet_matrix, wallet_columns, criteria_mask, wallet_history, DEFAULT_CRITERIA
+from wallet_signals import sync_signals, signal_matrix
+from utils import convert_fundtime_to_hours, fundtime_hours, compact_feed
+
+def make_mcaps_frame(rows, seed=0):
+    """Synthetic MCAPS frame with roughly 10% repeated tokens."""
+    rng = np.random.default_rng(seed)
+    tokens = [f"{i:08x}..." for i in rng.integers(0, int(rows * 0.9), rows)]
+    return pd.DataFrame({
+        'token': tokens,
+        'Mcap': rng.uniform(1e3, 1e6, rows),
+        'MaxMcap': rng.uniform(1e3, 5e6, rows),
+    })
+
+def create_mcaps_table(conn):
+    conn.execute("CREATE TABLE mcaps (token TEXT PRIMARY KEY, Mcap REAL, MaxMcap REAL)")
+
+def legacy_upsert(cursor, df):
+    for _, row in df.iterrows():
+        cursor.execute("""
+            INSERT OR REPLACE INTO mcaps (token, Mcap, MaxMcap)
+            VALUES (?, ?, ?)
+        """, (row['token'], row['Mcap'], row['MaxMcap']))
+
+FAILED = []  # equivalence checks that failed; the run exits non-zero if any did
+
+def check(label, mismatches):
+    """Print an equivalence check, recording it in FAILED when anything mismatched."""
+    print(f"{label}: {mismatches} mismatched" + (" -- FAILED" if mismatches else ""))
+    if mismatches:
+        FAILED.append(label)
+
+def timed(label, rows, func, unit='rows'):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {rows:>9} {unit}  {elapsed:8.3f}s  {rows / elapsed:>12,.0f} {unit}/sec")
+    return elapsed
+
+def bench_upsert(rows=200000):
+    """Compare the old iterrows INSERT OR REPLACE loop with bulk_upsert."""
+    df = make_mcaps_frame(rows)
+    print(f"=== MCAPS upsert ({rows} rows) ===")
+    results = {}
+    for label, func in [("iterrows INSERT OR REPLACE", lambda cur: legacy_upsert(cur, df)),
+                        ("bulk_upsert executemany", lambda cur: bulk_upsert(cur, 'mcaps', df, 'token', 'MaxMcap'))]:
+        conn = sqlite3.connect(':memory:')
+        create_mcaps_table(conn)
+        cursor = conn.cursor()
+        results[label] = timed(label, rows, lambda: func(cursor))
+        conn.commit()
+        conn.close()
+    legacy, bulk = results.values()
+    print(f"Speedup: {legacy / bulk:.1f}x")
+
+def make_feed_frame(rows, seed=0):
+    """Synthetic regular feed export in the AutoExtractor CSV layout."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp('2025-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 90 * 86400, rows), unit='s')
+    return pd.DataFrame({
+        'Contract': [f"{i:040x}pump" for i in rng.integers(0, rows // 3, rows)],
+        'Timestamp': dates.strftime('%Y-%m-%dT%H:%M:%S.000+00:00'),
+        'Name': rng.choice(['KWAK', 'SFG', 'MOE', 'CONX'], rows),
+        'Mcap': rng.integers(4000, 90000, rows),
+        'Liq': rng.integers(3000, 20000, rows),
+        'Liq%': [f"{v:.2f}%" for v in rng.uniform(5, 60, rows)],
+        'AG': rng.integers(0, 10, rows),
+        'Bundle': [f"{v:.2f}%" for v in rng.uniform(0, 60, rows)],
+        'FundingTime': [f"{v}h" if v % 5 else f"{v * 7}m" for v in rng.integers(1, 48, rows)],
+        'FundingSource': rng.choice(['Binance', 'MEXC', 'Coinbase'], rows),
+        'Dev%': [f"{v:.2f}%" for v in rng.uniform(0, 20, rows)],
+        'DevBal': rng.uniform(0, 40, rows).round(2),
+        'Links': rng.choice(['Yes', 'No'], rows),
+        'F': rng.integers(0, 9, rows),
+        'KYC': rng.integers(0, 5, rows),
+        'Unq': rng.integers(0, 9, rows),
+        'SM': rng.integers(0, 3, rows),
+        'TTC': rng.integers(1, 500, rows),
+        'B-Ratio': [f"{v:.1f}%" for v in rng.uniform(0, 100, rows)],
+        'FreshDeployer': rng.choice(['Yes', 'No'], rows),
+        'Drained': rng.integers(0, 3, rows),
+        'Desc': rng.choice(['Yes', 'No'], rows),
+    })
+
+def load_into(db_path, df, bulk):
+    """Append a parsed feed frame to an existing indexed table the way init_database does."""
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    if bulk:
+        prior = init_db.begin_bulk_load(conn)
+        init_db.drop_indexes(cursor, 'bench')
+    init_db.write_rows(cursor, 'regular', 'bench', df, 2,
+                       batch_size=init_db.BULK_BATCH_SIZE if bulk else init_db.WRITE_BATCH_SIZE)
+    init_db.create_indexes(cursor, 'bench')
+    conn.commit()
+    if bulk:
+        init_db.end_bulk_load(conn, prior)
+    conn.close()
+
+def bench_bulk_load(rows=1000000):
+    """Write a parsed 1M-row feed into an existing indexed table, default vs --bulk."""
+    print(f"=== Feed backfill ({rows} rows into an indexed table) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.csv')
+        make_feed_frame(rows).to_csv(path, index=False)
+        df, _ = init_db.parse_file('regular', path)
+        results = {}
+        for label, bulk in [("default", False), ("--bulk", True)]:
+            db_path = os.path.join(tmp, f"bench_{bulk}.db")
+            conn = sqlite3.connect(db_path)
+            init_db.create_table(conn.cursor(), 'regular', 'bench')
+            init_db.write_rows(conn.cursor(), 'regular', 'bench', df.head(10000), 1)
+            init_db.create_indexes(conn.cursor(), 'bench')
+            conn.commit()
+            conn.close()
+            results[label] = timed(f"write + index {label}", rows, lambda: load_into(db_path, df, bulk))
+    default, bulk = results.values()
+    print(f"Speedup: {default / bulk:.1f}x")
+
+def build_enrich_db(db_path, rows, seed=0):
+    """A feed with its Top table and MCAPS, keyed through tokens like a real data.db."""
+    rng = np.random.default_rng(seed)
+    feed = init_db.normalize_feed(make_feed_frame(rows, seed), 'bench')
+    tokens = feed['token'].drop_duplicates()
+    top = pd.DataFrame({'Contract': tokens.sample(frac=0.05, random_state=seed).values})
+    top = top.assign(Name='TOP', Mcap=rng.uniform(4e3, 9e4, len(top)), HighestMcap=rng.uniform(1e5, 5e6, len(top)),
+                     Multiples=rng.uniform(1, 50, len(top)))
+    mcaps = pd.DataFrame({'token': tokens.sample(frac=0.8, random_state=seed + 1).values})
+    mcaps = mcaps.assign(Mcap=rng.uniform(4e3, 9e4, len(mcaps)), MaxMcap=rng.uniform(4e3, 5e6, len(mcaps)))
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cache = {}
+    for kind, table, df in [('regular', 'bench', feed), ('top', 'bench10', top), ('mcaps', 'mcaps', mcaps)]:
+        init_db.create_table(cursor, kind, table)
+        init_db.write_rows(cursor, kind, table, init_db.sqlite_ready(df), 1, token_cache=cache)
+        init_db.create_indexes(cursor, table)
+    init_db.create_feed_views(cursor)
+    conn.commit()
+    conn.close()
+
+def legacy_enrich(conn):
+    """The pandas merge chain display_table used before feed views."""
+    df = pd.read_sql_query("SELECT tokens.address AS token, bench.* FROM bench LEFT JOIN tokens USING (token_id)", conn)
+    top_df = pd.read_sql_query("SELECT token_id, HighestMcap AS MaxMcap FROM bench10", conn)
+    mcaps_df = pd.read_sql_query("SELECT token_id, MaxMcap FROM mcaps", conn)
+    df = df.merge(top_df, on='token_id', how='left')
+    df = df.merge(mcaps_df, on='token_id', how='left', suffixes=('', '_mcaps'))
+    df['MaxMcap'] = df['MaxMcap'].fillna(df['MaxMcap_mcaps']).fillna(df['Mcap'])
+    df["X's"] = (df['MaxMcap'] / df['Mcap']).replace([float('inf'), -float('inf')], 0).fillna(0)
+    return df.sort_values('Date', ascending=False)
+
+def bench_enrich(rows=400000):
+    """Load an enriched feed (pandas merges vs the feed view) and keep it current after a Top update."""
+    print(f"=== Enriched feed load ({rows} rows) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        results = {}
+        for label, func in [("pandas merges", lambda: legacy_enrich(conn)),
+                            ("feed view", lambda: pd.read_sql_query("SELECT * FROM bench_view", conn).sort_values('Date', ascending=False)),
+                            ("feed view, first 50 rows", lambda: pd.read_sql_query("SELECT * FROM bench_view ORDER BY Date DESC LIMIT 50", conn))]:
+            results[label] = timed(label, rows, func)
+        cursor = conn.cursor()
+        top = pd.read_sql_query("SELECT token_id, Name, Mcap, HighestMcap * 2 AS HighestMcap, Multiples FROM bench10 LIMIT 1000", conn)
+        timed("Top update, enriched refresh", len(top), lambda: init_db.write_rows(cursor, 'top', 'bench10', top, 2))
+        timed("full enriched recompute", rows, lambda: cursor.execute(
+            f'INSERT OR REPLACE INTO bench_enriched (feed_rowid, token_id, MaxMcap, "X\'s") {init_db.enriched_select(cursor, "bench")}'))
+        conn.rollback()
+        conn.close()
+    print(f"Speedup (full load): {results['pandas merges'] / results['feed view']:.1f}x")
+
+def bench_paging(rows=400000, page_rows=40):
+    """First paint and page turns of a feed through FeedPager vs loading the whole view."""
+    print(f"=== Feed paging ({rows} rows, {page_rows}-row pages) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        timed("first page, FeedPager", page_rows, lambda: FeedPager(conn, 'bench_view', 'bench').rows(0, page_rows))
+        pager = FeedPager(conn, 'bench_view', 'bench')
+        timed("next 100 pages", 100 * page_rows, lambda: [pager.rows(i * page_rows, (i + 1) * page_rows) for i in range(100)])
+        timed("whole feed, FeedPager.frame", rows, pager.frame)
+        conn.close()
+
+def bench_filter(rows=400000, page_rows=40):
+    """A typical Filter Table session: compiled to SQL vs applied to the whole loaded feed."""
+    print(f"=== Feed filters ({rows} rows) ===")
+    filters = {'Mcap': (20000, float('inf')), 'Liq%': {'max': 0.3}, "X's": {'min': 2}}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        pager = FeedPager(conn, 'bench_view', 'bench')
+        where, params, _ = compile_filters(filters, pager.columns)
+        timed("count + first page, compiled", rows, lambda: pager.filtered(where, params).rows(0, page_rows))
+        timed("load + apply_filters", rows, lambda: apply_filters(pager.frame(), filters))
+        conn.close()
+
+def make_call_message(i, rng):
+    """Synthetic channel export message with a Stats embed and, every third message, a Top 10 embed."""
+    name = f"TK{i % 997}"
+    stats = (f"**MC**: `${int(rng.integers(4000, 900000)):,}` **Liq**: `${int(rng.integers(1000, 90000)):,}` ({rng.uniform(1, 60):.1f}%)\n"
+             f"**B:** `{rng.uniform(0, 100):.1f}%`\n"
+             f"**F**: `{rng.integers(0, 9)}` **KYC**: `{rng.integers(0, 5)}` **Unq**: `{rng.integers(0, 9)}` **SM**: `{rng.integers(0, 3)}`")
+    creator = (f"**AG Score**: `{rng.integers(0, 10)}/10`\n**Bundled**: `{rng.uniform(0, 60):.2f}%`\n"
+               f"Funded @ {rng.integers(1, 48)}h from [Binance](https://solscan.io/x)\n"
+               f"Dev ({rng.uniform(0, 20):.2f}% | {rng.uniform(0, 40):.2f} ◎)\nDrained {rng.integers(0, 2)} of {rng.integers(0, 3)}")
+    fields = [
+        {'name': f"Stats {name}", 'value': stats},
+        {'name': 'Stats Creator', 'value': creator},
+        {'name': 'Time to completion', 'value': f"`{rng.integers(1, 900)}` seconds"},
+        {'name': 'Links', 'value': '[X](https://x.com/a)'},
+    ]
+    embeds = [{'title': 'call', 'description': f"```{i:040x}pump```", 'fields': fields}]
+    if i % 3 == 0:
+        lines = [f"{k + 1}. [{name}{k}](https://dexscreener.com/solana/{i:036x}{k:04d}pump) @ 12.5K ➜ 1.25M Δ 100.0x" for k in range(10)]
+        embeds.append({'title': 'Top 10 SOLANA PF fomo calls', 'description': '\n'.join(lines)})
+    return {'timestamp': '2025-01-22T04:00:01.000+00:00', 'embeds': embeds}
+
+def legacy_call_message(message):
+    """The inline re.search parsing of AutoExtractor.parse_export before embed_parser (abridged: one message)."""
+    if not ('embeds' in message and message['embeds']):
+        return None
+    embed = message['embeds'][0]
+    if 'fields' not in embed:
+        return None
+    stats_field = next((f for f in embed['fields'] if f['name'].startswith('Stats ')), None)
+    if not stats_field:
+        return None
+    contract_match = re.search(r'```([\w\d]+)```', embed.get('description', ''))
+    stats_fields = {f['name']: f['value'] for f in embed['fields']}
+    stats_value = stats_fields.get(stats_field['name'], '')
+    mc = re.search(r'\*\*MC\*\*: `\$(\d{1,3}(?:,\d{3})*)`', stats_value)
+    liq = re.search(r'\*\*Liq\*\*: `\$(\d{1,3}(?:,\d{3})*)`', stats_value)
+    liq_percent = re.search(r'\*\*Liq\*\*:.*?\(?([\d.]+%)\)?', stats_value)
+    b_ratio = re.search(r'\*\*B:\**\s*`([\d.]+%)`', stats_value)
+    wallet_match = re.search(r'\*\*F\*\*: `(\d+)` \*\*KYC\*\*: `(\d+)` \*\*Unq\*\*: `(\d+)` \*\*SM\*\*: `(\d+)`', stats_value)
+    creator_value = stats_fields.get('Stats Creator', '')
+    ag = re.search(r'AG Score\*\*: `(\d+)/10`', creator_value)
+    bundle = re.search(r'Bundled\*\*: `([\d.]+%)`', creator_value)
+    funding_time = re.search(r'@ *(\d+[a-z]+)', creator_value)
+    funding_source = re.search(r'\[(.*?)\]', creator_value)
+    dev = re.search(r'\(([\d.]+%)\s*\|\s*([\d.]+)\s*◎\)', creator_value.replace('`', '').strip())
+    drained_match = re.search(r'Drained (\d+) of (\d+)', creator_value)
+    ttc_field = stats_fields.get('Time to completion', '')
+    ttc = re.search(r'`(\d+)` seconds', ttc_field) if ttc_field else None
+    return {
+        'Contract': contract_match.group(1) if contract_match else '',
+        'Timestamp': message['timestamp'],
+        'Name': stats_field['name'].split('Stats ')[1],
+        'Mcap': mc.group(1).replace(',', '') if mc else '',
+        'Liq': liq.group(1).replace(',', '') if liq else '',
+        'Liq%': liq_percent.group(1) if liq_percent else '',
+        'AG': ag.group(1) if ag else '',
+        'Bundle': bundle.group(1) if bundle else '',
+        'FundingTime': funding_time.group(1) if funding_time else '',
+        'FundingSource': funding_source.group(1) if funding_source else '',
+        'Dev%': dev.group(1) if dev else '',
+        'DevBal': dev.group(2) if dev else '',
+        'Links': 'Yes' if 'http' in stats_fields.get('Links', '') else 'No',
+        'F': wallet_match.group(1) if wallet_match else '0',
+        'KYC': wallet_match.group(2) if wallet_match else '0',
+        'Unq': wallet_match.group(3) if wallet_match else '0',
+        'SM': wallet_match.group(4) if wallet_match else '0',
+        'TTC': ttc.group(1) if ttc else '',
+        'B-Ratio': b_ratio.group(1) if b_ratio else '',
+        'FreshDeployer': 'Yes' if drained_match and drained_match.groups() == ('0', '0') else 'No',
+        'Drained': drained_match.group(1) if drained_match else '0',
+        'Desc': 'Yes' if stats_fields.get('Token Description', '') and stats_fields['Token Description'].strip() else 'No',
+    }
+
+def legacy_top10_lines(description):
+    """The inline re.search parsing of AutoTop10 before embed_parser, one Top 10 embed at a time."""
+    calls = []
+    for line in description.split('\n'):
+        contract_match = re.search(r'\[(.*?)\]\((?:https://www\.pump\.fun|https://dexscreener\.com/solana)/(.*?)\)', line)
+        if contract_match:
+            start_mcap = re.search(r'@ (\d+\.?\d*(?:K|M))', line)
+            end_mcap = re.search(r'➜ (\d+\.?\d*(?:K|M))', line)
+            profit_multiples = re.search(r'Δ (\d+\.?\d*x)', line)
+            calls.append((*contract_match.groups(), start_mcap.group(1) if start_mcap else '',
+                          end_mcap.group(1) if end_mcap else '', profit_multiples.group(1) if profit_multiples else ''))
+    return calls
+
+def parser_edge_cases():
+    """Messages the synthetic export lacks: no embeds, no Stats field, sparse or odd fields."""
+    rng = np.random.default_rng(1)
+    sparse = make_call_message(1, rng)
+    sparse['embeds'][0]['fields'] = [{'name': 'Stats ODD', 'value': '**MC**: `$1,234,567` **Liq**: 45%'},
+                                     {'name': 'Stats Creator', 'value': 'Drained 0 of 0 @5m from [] (`3.5% | 0.1 ◎`)'},
+                                     {'name': 'Token Description', 'value': ' '}, {'name': 'Links', 'value': 'none'}]
+    sparse['embeds'][0]['description'] = 'no contract'
+    no_stats = make_call_message(2, rng)
+    no_stats['embeds'][0]['fields'] = [{'name': 'Links', 'value': 'http://x'}]
+    top10 = '\n'.join(["1. [A](https://www.pump.fun/abc) @ 5K ➜ 2.5M Δ 500x", "2. [B](https://dexscreener.com/solana/def) @ 1.2M",
+                        "header [C](https://example.com/ghi) @ 1K", ""])
+    return [sparse, no_stats, {'timestamp': 'x', 'embeds': []}, {'timestamp': 'x'}, {'embeds': [{'title': 'call'}]}], [top10]
+
+def bench_parser(messages=100000):
+    """Throughput of the shared embed parser on a synthetic channel export, against the inline parsing it replaced."""
+    rng = np.random.default_rng(0)
+    data = [make_call_message(i, rng) for i in range(messages)]
+    top10 = [embed['description'] for message in data for embed in message['embeds'] if embed_parser.is_top10_embed(embed)]
+    print(f"=== Embed parser ({messages} messages, {len(top10)} Top 10 embeds) ===")
+    edge_messages, edge_top10 = parser_edge_cases()
+    mismatches = sum(embed_parser.parse_call_message(m) != legacy_call_message(m) for m in data + edge_messages)
+    mismatches += sum(list(embed_parser.parse_top10_lines(d)) != legacy_top10_lines(d) for d in top10 + edge_top10)
+    check("parser vs legacy, calls and Top 10 embeds", mismatches)
+    timed("legacy call parsing", messages, lambda: [legacy_call_message(m) for m in data], unit='msgs')
+    timed("parse_call_message", messages, lambda: [embed_parser.parse_call_message(m) for m in data], unit='msgs')
+    timed("legacy Top 10 parsing", len(top10), lambda: [legacy_top10_lines(d) for d in top10], unit='msgs')
+    timed("parse_top10_lines", len(top10), lambda: [list(embed_parser.parse_top10_lines(d)) for d in top10], unit='msgs')
+
+def bench_frames(rows=400000):
+    """Reopening a whole feed frame through the session FrameCache."""
+    print(f"=== Session frame cache ({rows} rows) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        pager = FeedPager(conn, 'bench_view', 'bench')
+        frames = FrameCache(conn)
+        timed("first load (miss)", rows, lambda: frames.get(('feed', pager.view), pager.frame))
+        timed("reopen x10 (hits)", 10 * rows, lambda: [frames.get(('feed', pager.view), pager.frame) for _ in range(10)])
+        print(frames.summary())
+        conn.close()
+
+def legacy_format(df, applied_configs):
+    """The per-cell apply and iterrows renderer format_table_columns replaced (abridged: no colors)."""
+    df = df.drop(columns=['token_id', 'feed_rowid'], errors='ignore')
+    col_widths = {}
+    for col in df.columns:
+        if col == "token":
+            df[col] = df[col].apply(lambda x: f"{str(x)[:8]}..." if pd.notna(x) and len(str(x)) > 8 else str(x))
+        elif col == "Date":
+            df[col] = df[col].apply(lambda x: x.strftime('%d/%m/%y %H:%M') if pd.notna(x) and isinstance(x, pd.Timestamp) else "NaN")
+        elif col in ["Mcap", "Liq", "MaxMcap", "DevBal"]:
+            df[col] = df[col].apply(lambda x: f"${x:,.0f}" if pd.notna(x) else "NaN")
+        else:
+            df[col] = df[col].apply(lambda x: str(x) if pd.notna(x) else "NaN")
+        col_widths[col] = max(len(str(col)), df[col].str.len().max())
+    rows = []
+    for _, row in df.iterrows():
+        rows.append(" | ".join(f"{str(row[col]):<{col_widths[col]}}" for col in df.columns))
+    return "\n".join(rows)
+
+def bench_render(repeats=200):
+    """Render one page of a feed view: legacy iterrows, format_table_columns, and a cached redraw."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, 5000)
+        conn = sqlite3.connect(db_path)
+        page = FeedPager(conn, 'bench_view', 'bench').rows(0, 200)
+        conn.close()
+    rng = np.random.default_rng(0)
+    for rows, cols in [(50, 30), (200, 40)]:
+        df = page.head(rows).copy()
+        configs = {}
+        for i in range(cols - df.shape[1]):
+            configs[f"Wallet {i + 1}"] = {}
+            df[f"Wallet {i + 1}"] = rng.choice(['buy', 'skip', 'rug'], rows)
+        print(f"=== Page render ({rows} rows x {cols} columns, {len(configs)} wallet columns, x{repeats}) ===")
+        renderer = TableRenderer()
+        timed("legacy apply + iterrows", repeats * rows, lambda: [legacy_format(df, configs) for _ in range(repeats)])
+        timed("format_table_columns", repeats * rows, lambda: [format_table_columns(df, configs) for _ in range(repeats)])
+        timed("TableRenderer redraw", repeats * rows, lambda: [renderer.render(df, 0, rows, configs, lambda start, stop: df.iloc[start:stop])
+                                                               for _ in range(repeats)])
+
+def legacy_wallet(df, criteria):
+    """The per-row iterrows evaluation apply_wallet_config replaced."""
+    result = []
+    for _, row in df.iterrows():
+        meets_criteria = True
+        for key, condition in criteria.items():
+            if key not in df.columns:
+                continue
+            value = row[key]
+            if pd.isna(value):
+                meets_criteria = False
+                break
+            if key == "Links":
+                if condition is not None and value != condition:
+                    meets_criteria = False
+            elif key in ["Mcap", "Liq", "AG", "F", "KYC", "Unq", "SM", "DevBal"]:
+                if not (condition.get("min", float('-inf')) <= value <= condition.get("max", float('inf'))):
+                    meets_criteria = False
+            elif key in ["Bundle", "Dev%"]:
+                if value > condition.get("max", float('inf')):
+                    meets_criteria = False
+            elif key == "Funding":
+                hours = convert_fundtime_to_hours(value.split(' (')[0]) if '(' in value else float('nan')
+                if pd.isna(hours) or hours < condition.get("min", 0):
+                    meets_criteria = False
+            elif key == "X's":
+                if value < condition.get("min", float('-inf')):
+                    meets_criteria = False
+        result.append("buy" if meets_criteria else "skip")
+    return result
+
+def random_criteria(df, rng):
+    """A wallet config over a random subset of the default keys, plus keys only checked for NaN."""
+    criteria = {}
+    for key in rng.permutation(list(DEFAULT_CRITERIA) + ['TTC', 'Desc', 'Missing']):
+        if rng.random() < 0.5:
+            continue
+        if key == "Links":
+            criteria[key] = rng.choice([None, "Yes", "No", "Any"])
+        elif key == "Funding":
+            criteria[key] = {"min": float(rng.integers(0, 30))}
+        elif key in df.columns and pd.api.types.is_numeric_dtype(df[key]):
+            low, high = np.nanpercentile(df[key], [rng.uniform(0, 30), rng.uniform(70, 100)])
+            criteria[key] = {"min": low, "max": high} if key in DEFAULT_CRITERIA and "min" in DEFAULT_CRITERIA[key] else {"max": high}
+            if key == "X's":
+                criteria[key] = {"min": low}
+        else:
+            criteria[key] = "Yes"
+    return criteria
+
+def bench_wallet(rows=100000, configs=40, wallets=100):
+    """Apply wallet configs to a loaded feed: legacy iterrows, one mask per config, and one matrix for all."""
+    print(f"=== Wallet configs ({rows} rows) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        df = FeedPager(conn, 'bench_view', 'bench').frame()
+        conn.close()
+    rng = np.random.default_rng(0)
+    # Real feeds mix minutes, days, empty sources and missing values
+    df['Funding'] = rng.choice(['15m (MEXC)', '3d ()', '14h (Binance)', '2h ()', '0.5h (Coinbase)', None], len(df))
+    df['FundingHours'] = fundtime_hours(df['Funding'].str.split(' (', regex=False).str[0])
+    for col in ['Mcap', 'Bundle', "X's", 'Links', 'TTC']:
+        df.loc[df.sample(frac=0.02, random_state=len(col)).index, col] = None
+    checks = [random_criteria(df, rng) for _ in range(configs)]
+    sample = df.sample(2000, random_state=0)
+    matrix = wallet_matrix(sample, checks)
+    mismatches = sum(apply_wallet_config(sample, 'check', criteria) != legacy_wallet(sample, criteria) or
+                     matrix[:, j].tolist() != [x == "buy" for x in legacy_wallet(sample, criteria)]
+                     for j, criteria in enumerate(checks))
+    check(f"{configs} random configs vs the iterrows evaluation", mismatches)
+    criteria = {**DEFAULT_CRITERIA, "Mcap": {"min": 20000, "max": 80000}, "Links": "Yes", "Funding": {"min": 2}}
+    timed("legacy iterrows", rows, lambda: legacy_wallet(df, criteria))
+    timed("apply_wallet_config", rows, lambda: apply_wallet_config(df, 'bench', criteria))
+    print(f"--- {wallets} wallets at once ---")
+    configs = {f"Wallet {i + 1}": random_criteria(df, rng) for i in range(wallets)}
+    timed("one filter pass (reference)", rows, lambda: criteria_mask(df, criteria))
+    timed("apply_wallet_config each", wallets * rows, lambda: [apply_wallet_config(df, name, c) for name, c in configs.items()])
+    timed("wallet_matrix + columns", wallets * rows,
+          lambda: wallet_columns(wallet_matrix(df, configs.values()), configs, df.index))
+
+def bench_history(rows=400000, wallets=10):
+    """Per-wallet buys, 2x+ and X's over a whole feed: SQL aggregates vs loading the feed and masking it."""
+    print(f"=== Wallet history ({rows} rows, {wallets} wallets) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        init_db.refresh_catalog(conn.cursor())
+        conn.commit()
+        df = FeedPager(conn, 'bench_view', 'bench').frame()
+        rng = np.random.default_rng(0)
+        configs = {f"Wallet {i + 1}": {**random_criteria(df, rng), "Funding": {"min": float(i % 3) * 8}} for i in range(wallets)}
+        configs["Wallet 1"]["Targeted Feed"] = "Bench"
+        history = wallet_history(conn, configs)
+        mismatches = 0
+        for name, buys, two_x, avg_x, max_x in history[["Wallet", "Buys", "2x+", "Avg X's", "Max X's"]].itertuples(index=False):
+            xs = df["X's"][criteria_mask(df, configs[name])]
+            mismatches += (buys, two_x) != (len(xs), (xs >= 2).sum()) or not np.allclose([avg_x, max_x], [xs.mean(), xs.max()], equal_nan=True)
+        check(f"{len(history)} wallets ({history['Buys'].sum()} buys) vs criteria_mask on the loaded feed", mismatches)
+        def load_and_mask():
+            frame = FeedPager(conn, 'bench_view', 'bench').frame()
+            return [criteria_mask(frame, criteria) for criteria in configs.values()]
+        timed("load feed + criteria_mask", wallets * rows, load_and_mask)
+        timed("wallet_history (SQL)", wallets * rows, lambda: wallet_history(conn, configs))
+        conn.close()
+
+def bench_funding(rows=400000):
+    """FundingTime filters on the stored FundingHours vs parsing FundingTime per pass, and the backfill."""
+    print(f"=== FundingHours ({rows} rows) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        df = FeedPager(conn, 'bench_view', 'bench').frame()
+        filters = {'FundingTime': {'min': 12}}
+        where, params, _ = compile_filters(filters, df.columns)
+        expected = sum(convert_fundtime_to_hours(x) >= 12 for x in df['FundingTime'])
+        counts = [len(apply_filters(df, filters)), len(apply_filters(df.drop(columns='FundingHours'), filters)),
+                  conn.execute(f"SELECT COUNT(*) FROM bench_view WHERE {where}", params).fetchone()[0]]
+        print(f"FundingTime >= 12h: {expected} rows parsed per row, {counts} from FundingHours / fallback / SQL")
+        check("FundingTime >= 12h counts vs parsing per row", sum(count != expected for count in counts))
+        timed("str.extract per pass", rows, lambda: df[df['FundingTime'].str.extract(r'(\d+)')[0].astype(float) >= 12])
+        timed("FundingHours mask", rows, lambda: apply_filters(df, filters))
+        # The first-digits UDF compile_filters used before FundingHours
+        conn.create_function("first_number", 1, lambda x: float(x.rstrip('hm')) if x else None, deterministic=True)
+        for hours in [12, 40]:
+            timed(f"SQL first_number() >= {hours}", rows,
+                  lambda: conn.execute("SELECT COUNT(*) FROM bench_view WHERE first_number(FundingTime) >= ?", (hours,)).fetchone())
+            timed(f"SQL FundingHours >= {hours}", rows,
+                  lambda: conn.execute('SELECT COUNT(*) FROM bench_view WHERE "FundingHours" >= ?', (hours,)).fetchone())
+        stored = conn.execute("SELECT FundingHours FROM bench ORDER BY rowid").fetchall()
+        cursor = conn.cursor()
+        cursor.execute("DROP VIEW bench_view")
+        cursor.execute("DROP INDEX idx_bench_funding")
+        cursor.execute("ALTER TABLE bench DROP COLUMN FundingHours")
+        timed("migration backfill", rows, lambda: init_db.migrate_funding_hours(cursor))
+        init_db.create_feed_view(cursor, 'bench')
+        backfilled = cursor.execute('SELECT FundingHours FROM bench ORDER BY rowid').fetchall()
+        check("backfilled FundingHours vs ingest", int(backfilled != stored))
+        conn.close()
+
+def bench_signals(rows=400000, wallets=20, day=5000):
+    """Stored wallet signals: first fill, a day of new calls, and applying them vs wallet_matrix."""
+    print(f"=== Wallet signals ({rows} rows, {wallets} wallets, {day} new rows) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        df = FeedPager(conn, 'bench_view', 'bench').frame()
+        rng = np.random.default_rng(0)
+        configs = {f"Wallet {i + 1}": random_criteria(df, rng) for i in range(wallets)}
+        configs["Wallet 1"]["X's"] = {"min": 2.0}
+        timed("first fill", wallets * rows, lambda: sync_signals(conn, 'bench', configs))
+        conn.commit()
+        calls = init_db.normalize_feed(make_feed_frame(day, seed=1), 'bench')
+        init_db.write_rows(conn.cursor(), 'regular', 'bench', init_db.sqlite_ready(calls), 2)
+        df = FeedPager(conn, 'bench_view', 'bench').frame()
+        timed("wallet_matrix, whole feed", wallets * len(df), lambda: wallet_matrix(df, configs.values()))
+        timed("sync_signals, new rows", wallets * day, lambda: sync_signals(conn, 'bench', configs))
+        timed("sync_signals, nothing new", wallets, lambda: sync_signals(conn, 'bench', configs), unit='wallets')
+        matrix = signal_matrix(conn, 'bench', configs, list(configs), df['feed_rowid'])
+        check("stored signals vs wallet_matrix decisions", (matrix != wallet_matrix(df, configs.values())).sum())
+        timed("signal_matrix (apply)", wallets * len(df),
+              lambda: signal_matrix(conn, 'bench', configs, list(configs), df['feed_rowid']))
+        conn.close()
+
+def bench_dtypes(rows=400000, wallets=20):
+    """Memory of a feed frame as loaded vs with the FEED_DTYPES plan, and filters and wallets on each."""
+    print(f"=== Feed dtypes ({rows} rows, {wallets} wallets) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        build_enrich_db(db_path, rows)
+        conn = sqlite3.connect(db_path)
+        raw = pd.read_sql_query("SELECT * FROM bench_view", conn, parse_dates=['Date'])
+        conn.close()
+    df = compact_feed(raw.copy())
+    before, after = raw.memory_usage(deep=True), df.memory_usage(deep=True)
+    for col in df.columns:
+        if before[col] != after[col]:
+            print(f"{col:<14}{str(raw[col].dtype):>9} {before[col] / 2**20:7.1f} MB -> {str(df[col].dtype):>9} {after[col] / 2**20:6.1f} MB")
+    print(f"total: {before.sum() / 2**20:.1f} MB -> {after.sum() / 2**20:.1f} MB")
+    rng = np.random.default_rng(0)
+    configs = [random_criteria(raw, rng) for _ in range(wallets)]
+    check("wallet_matrix decisions, loaded vs compact", (wallet_matrix(raw, configs) != wallet_matrix(df, configs)).sum())
+    filters = {'Links': 'Yes', 'Liq%': {'max': 0.5}, 'AG': (2, 8), 'Mcap': (1e4, 5e5)}
+    loaded, compact = len(apply_filters(raw, filters)), len(apply_filters(df, filters))
+    print(f"filtered rows: {loaded} loaded, {compact} compact")
+    check("filtered rows, loaded vs compact", abs(loaded - compact))
+    for label, frame in [("loaded", raw), ("compact", df)]:
+        timed(f"wallet_matrix, {label}", wallets * rows, lambda: wallet_matrix(frame, configs))
+        timed(f"apply_filters, {label}", rows, lambda: apply_filters(frame, filters))
+
+def ingest_csv(cursor, kind, table, path):
+    """Record path in the manifest and write its rows, as init_database does for a new file."""
+    df, _ = init_db.parse_file(kind, path)
+    source_id = init_db.add_manifest_entry(cursor, init_db.file_hash(path), path, os.path.getsize(path),
+                                           os.path.getmtime(path), kind, table, row_count=len(df))
+    init_db.create_table(cursor, kind, table)
+    init_db.write_rows(cursor, kind, table, df, source_id)
+    return {'source_id': source_id, 'path': path, 'kind': kind, 'table_name': table, 'row_count': len(df)}
+
+def bench_rollback(rows=200000):
+    """Delete a newer MCAPS file overlapping an older one; mcaps must match a rebuild without it."""
+    print(f"=== MCAPS rollback ({rows} rows per file, half of them overlapping) ===")
+    rng = np.random.default_rng(0)
+    tokens = np.array([f"{i:040x}pump" for i in range(rows * 3 // 2)])
+    # The newer file re-reports half of the older file's tokens, its MaxMcap winning only some of them
+    files = [pd.DataFrame({'token': tokens[:rows]}), pd.DataFrame({'token': tokens[rows // 2:]})]
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for day, df in enumerate(files, 1):
+            df = df.assign(market_cap_usd=rng.uniform(4e3, 9e4, len(df)), max_market_cap_usd=rng.uniform(1e5, 5e6, len(df)))
+            paths.append(os.path.join(tmp, f"MCAPS-2025010{day}-1200.csv"))
+            df.to_csv(paths[-1], index=False)
+        dumps = []
+        for name, ingested in [("incremental", paths), ("rebuild", paths[:1])]:
+            conn = sqlite3.connect(os.path.join(tmp, f"{name}.db"))
+            cursor = conn.cursor()
+            init_db.create_manifest_table(cursor)
+            entries = [ingest_csv(cursor, 'mcaps', 'mcaps', path) for path in ingested]
+            if name == "incremental":
+                def rollback():
+                    keys = init_db.rollback_source(cursor, entries[1])
+                    init_db.refill_keys(cursor, 'mcaps', 'mcaps', keys, entries[:1])
+                timed("rollback + refill", rows, rollback)
+            dumps.append(pd.read_sql_query("SELECT address, Mcap, MaxMcap FROM mcaps JOIN tokens USING (token_id) ORDER BY address", conn))
+            conn.close()
+    incremental, rebuild = dumps
+    mismatches = len(incremental) != len(rebuild) or (incremental.to_numpy() != rebuild.to_numpy()).any(axis=1).sum()
+    check("mcaps after deleting the newer file vs a rebuild without it", int(mismatches))
+
+BENCHMARKS = {
+    'upsert': bench_upsert,
+    'bulk_load': bench_bulk_load,
+    'parser': bench_parser,
+    'enrich': bench_enrich,
+    'paging': bench_paging,
+    'filter': bench_filter,
+    'frames': bench_frames,
+    'render': bench_render,
+    'wallet': bench_wallet,
+    'history': bench_history,
+    'funding': bench_funding,
+    'signals': bench_signals,
+    'dtypes': bench_dtypes,
+    'rollback': bench_rollback,
+}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            continue
+        BENCHMARKS[name]()
+    if FAILED:
+        sys.exit(f"{len(FAILED)} equivalence check(s) failed: {'; '.join(FAILED)}")
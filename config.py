@@ -2,4 +2,6 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIRECTORY = os.path.join(BASE_DIR, 'data')
-WALLETS_FILE = os.path.join(BASE_DIR, 'wallets.json')
\ No newline at end of file
+WALLETS_FILE = os.path.join(BASE_DIR, 'wallets.json')
+# Memory budget of the CLI's session cache of loaded feed and Top frames
+FRAME_CACHE_MB = 1024
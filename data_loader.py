@@ -3,7 +3,12 @@ import sqlite3
 import os
 import platform
 import logging
-from config import DATA_DIRECTORY
+import json
+import time
+from collections import OrderedDict
+from config import DATA_DIRECTORY, FRAME_CACHE_MB
+from init_db import catalog_tables, catalog_layout, catalog_stats
+from utils import compact_feed, FLOAT32_COLUMNS
 
 logging.basicConfig(
     filename='debug.log',
@@ -12,15 +17,233 @@ logging.basicConfig(
     filemode='w'
 )
 
+PAGE_BLOCK_ROWS = 256  # rows per keyset fetch; a screen page spans one or two blocks
+PAGE_CACHE_BLOCKS = 8
+
 def get_db_connection():
     return sqlite3.connect(os.path.join(DATA_DIRECTORY, 'data.db'))
 
 def load_mcaps_db(conn):
-    # Updated to use 'token' instead of 'Contract'
-    df = pd.read_sql_query("SELECT token, MaxMcap FROM mcaps", conn)
-    logging.debug(f"MCAPS loaded from DB - {len(df)} rows, First 5 tokens: {df['token'].tolist()[:5]}")
+    # Keyed by tokens.token_id like every feed table
+    df = pd.read_sql_query("SELECT token_id, MaxMcap FROM mcaps", conn)
+    logging.debug(f"MCAPS loaded from DB - {len(df)} rows, First 5 token ids: {df['token_id'].tolist()[:5]}")
     return df
 
+class Catalog:
+    """table_catalog (see init_db.refresh_catalog), read once per CLI session.
+
+    PRAGMA data_version only changes when another connection commits, so the entries
+    are reloaded after an ingest and otherwise served from memory. A data.db written
+    before the catalog existed is described by a one-off scan of its tables instead.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.version = None
+        self.entries = {}
+        self.loads = 0
+
+    def current(self):
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            self.version = version
+            self.entries = self.load()
+            self.loads += 1
+        return self.entries
+
+    def load(self):
+        keys = ['table_name', 'kind', 'row_count', 'min_date', 'max_date', 'columns', 'pair', 'view_name']
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"SELECT {', '.join(keys)} FROM table_catalog ORDER BY rowid")
+            rows = cursor.fetchall()
+        except sqlite3.OperationalError:
+            logging.debug("No table_catalog in data.db, scanning tables")
+            tables = catalog_tables(cursor)
+            rows = []
+            for table in tables:
+                kind, columns, pair, _ = catalog_layout(cursor, table, tables)
+                # Views are only trusted once init_db has catalogued them
+                rows.append((table, kind, *catalog_stats(cursor, table, columns), json.dumps(columns), pair, None))
+        entries = {}
+        for row in rows:
+            entry = dict(zip(keys, row))
+            entry['columns'] = json.loads(entry['columns'])
+            entries[entry['table_name']] = entry
+        return entries
+
+    def tables(self):
+        return list(self.current())
+
+    def entry(self, table):
+        return self.current().get(table)
+
+class FrameCache:
+    """Whole frames loaded during a CLI session, reused until data.db changes.
+
+    Entries belong to the PRAGMA data_version they were loaded under; once another
+    connection commits, every older frame is dropped. The least recently used frames
+    are evicted to keep their deep memory use within budget bytes. get() hands out
+    copies, since display_table adds wallet config columns in place.
+    """
+
+    def __init__(self, conn, budget=FRAME_CACHE_MB * 1024 * 1024):
+        self.conn = conn
+        self.budget = budget
+        self.version = None
+        self.frames = OrderedDict()
+        self.sizes = {}
+        self.used = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, load):
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            self.version = version
+            self.clear()
+        if key in self.frames:
+            self.hits += 1
+            self.frames.move_to_end(key)
+            return self.frames[key].copy()
+        self.misses += 1
+        start = time.perf_counter()
+        df = load()
+        size = int(df.memory_usage(deep=True).sum())
+        logging.debug(f"Frame cache miss {key}: {len(df)} rows, {size / (1024 * 1024):,.1f} MB in {time.perf_counter() - start:.2f}s")
+        if size <= self.budget:
+            self.frames[key] = df
+            self.sizes[key] = size
+            self.used += size
+            while self.used > self.budget:
+                evicted, _ = self.frames.popitem(last=False)
+                self.used -= self.sizes.pop(evicted)
+                self.evictions += 1
+                logging.debug(f"Frame cache evicted {evicted}")
+        return df.copy()
+
+    def clear(self):
+        self.frames.clear()
+        self.sizes.clear()
+        self.used = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'frames': len(self.frames), 'bytes': self.used, 'budget': self.budget}
+
+    def summary(self):
+        return (f"Frame cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions, "
+                f"{len(self.frames)} frames in {self.used / (1024 * 1024):,.1f} of {self.budget / (1024 * 1024):,.0f} MB")
+
+class FeedPager:
+    """Read a feed view a window at a time, newest call first.
+
+    Rows come in fixed-size blocks fetched with keyset pagination on (Date, feed_rowid),
+    which seeks the Date index instead of skipping an OFFSET. Only the block anchors and
+    the last few blocks are kept, so memory does not grow with the feed. where/params
+    restrict the feed (see table_utils.compile_filters); count, when known from the
+    catalog, saves counting the unfiltered feed.
+    """
+
+    def __init__(self, conn, view, table, where=None, params=(), block_rows=PAGE_BLOCK_ROWS, cache_blocks=PAGE_CACHE_BLOCKS, count=None):
+        self.conn = conn
+        self.view = view
+        self.table = table
+        self.where = where
+        self.params = tuple(params)
+        self.block_rows = block_rows
+        self.cache_blocks = cache_blocks
+        self.columns = [col[0] for col in conn.execute(f"SELECT * FROM {view} LIMIT 0").description]
+        if where:
+            self.count = conn.execute(f"SELECT COUNT(*) FROM {view} WHERE {where}", self.params).fetchone()[0]
+        elif count is not None:
+            self.count = count
+        else:
+            # COUNT(*) walks the narrowest index of the feed, not the rows themselves
+            self.count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self.anchors = [None]  # anchors[i] is the (Date, feed_rowid) key just before block i
+        self.blocks = OrderedDict()
+
+    def filtered(self, where, params):
+        """A pager over the same view restricted by where instead."""
+        return FeedPager(self.conn, self.view, self.table, where, params, self.block_rows, self.cache_blocks)
+
+    def stored_floats(self, df):
+        """df with its float32 columns replaced by the float64 values stored in data.db.
+
+        Compacted frames are exact enough to display and decide on, but an export writes
+        the values as ingested. df must hold rows of this pager, with feed_rowid.
+        """
+        columns = [col for col in FLOAT32_COLUMNS if col in df.columns]
+        if not columns or 'feed_rowid' not in df.columns:
+            return df
+        where = f" WHERE {self.where}" if self.where else ""
+        select = ', '.join(f'"{col}"' for col in columns)
+        stored = pd.read_sql_query(f"SELECT feed_rowid, {select} FROM {self.view}{where}", self.conn,
+                                   params=self.params, index_col='feed_rowid')
+        return df.assign(**{col: df['feed_rowid'].map(stored[col]) for col in columns})
+
+    def query(self, where, params, limit):
+        if self.where:
+            where = f"({self.where}) AND {where}"
+            params = (*self.params, *params)
+        sql = f"SELECT * FROM {self.view} WHERE {where} ORDER BY Date DESC, feed_rowid DESC LIMIT ?"
+        return pd.read_sql_query(sql, self.conn, params=(*params, limit))
+
+    def fetch(self, anchor):
+        if anchor is None:
+            df = self.query("Date IS NOT NULL", (), self.block_rows)
+        elif anchor[0] is not None:
+            df = self.query("Date IS NOT NULL AND (Date, feed_rowid) < (?, ?)", anchor, self.block_rows)
+        else:
+            df = self.query("Date IS NULL AND feed_rowid < ?", anchor[1:], self.block_rows)
+        if len(df) < self.block_rows and (anchor is None or anchor[0] is not None):
+            # Undated calls sort after every dated one
+            rest = self.query("Date IS NULL", (), self.block_rows - len(df))
+            df = pd.concat([df, rest], ignore_index=True) if not df.empty else rest
+        return df
+
+    def block(self, index):
+        if index in self.blocks:
+            self.blocks.move_to_end(index)
+            return self.blocks[index]
+        # Anchors are known up to one block past the furthest block read so far
+        for known in range(len(self.anchors) - 1, index):
+            if len(self.block(known)) < self.block_rows:
+                return self.block(known).iloc[0:0]
+        df = self.fetch(self.anchors[index])
+        if index == len(self.anchors) - 1 and len(df) == self.block_rows:
+            last = df.iloc[-1]
+            self.anchors.append((last['Date'] if pd.notna(last['Date']) else None, int(last['feed_rowid'])))
+        # Compacted once per cached block; a page spanning two blocks concatenates
+        # categoricals with different categories back to plain strings, which display the same
+        df = self.blocks[index] = compact_feed(df)
+        while len(self.blocks) > self.cache_blocks:
+            self.blocks.popitem(last=False)
+        return df
+
+    def rows(self, start, stop):
+        """Rows [start, stop) of the feed in display order, numbered in a '#' column."""
+        stop = min(stop, self.count)
+        if start >= stop:
+            return pd.DataFrame()
+        first, last = start // self.block_rows, (stop - 1) // self.block_rows
+        df = pd.concat([self.block(i) for i in range(first, last + 1)], ignore_index=True)
+        offset = start - first * self.block_rows
+        df = df.iloc[offset:offset + stop - start].reset_index(drop=True)
+        df['Date'] = pd.to_datetime(df['Date'], format='ISO8601', errors='coerce')
+        df.insert(0, "#", range(start + 1, start + 1 + len(df)))
+        return df
+
+    def frame(self):
+        """The whole feed in the same order, for actions that need every row."""
+        where = f" WHERE {self.where}" if self.where else ""
+        # Compacted before the sort, whose row gather then moves codes instead of strings
+        df = compact_feed(pd.read_sql_query(f"SELECT * FROM {self.view}{where}", self.conn, params=self.params))
+        df = df.sort_values(['Date', 'feed_rowid'], ascending=False, na_position='last', ignore_index=True)
+        df['Date'] = pd.to_datetime(df['Date'], format='ISO8601', errors='coerce')
+        df.insert(0, "#", range(1, len(df) + 1))
+        return df
+
 def load_and_combine_csv(directory):
     if not os.path.exists(os.path.join(directory, 'data.db')):
         print(f"Error: Database not found at {directory}/data.db. Run init_db.py first.")
@@ -0,0 +1,240 @@
+import os
+import re
+import json
+import time
+
+# Patterns are compiled once at import; each is searched independently so results
+# match the original per-field re.search calls exactly (Liq and Liq% overlap).
+MC_PATTERN = re.compile(r'\*\*MC\*\*: `\$(\d{1,3}(?:,\d{3})*)`')
+LIQ_PATTERN = re.compile(r'\*\*Liq\*\*: `\$(\d{1,3}(?:,\d{3})*)`')
+LIQ_PERCENT_PATTERN = re.compile(r'\*\*Liq\*\*:.*?\(?([\d.]+%)\)?')
+B_RATIO_PATTERN = re.compile(r'\*\*B:\**\s*`([\d.]+%)`')
+WALLET_PATTERN = re.compile(r'\*\*F\*\*: `(\d+)` \*\*KYC\*\*: `(\d+)` \*\*Unq\*\*: `(\d+)` \*\*SM\*\*: `(\d+)`')
+AG_PATTERN = re.compile(r'AG Score\*\*: `(\d+)/10`')
+BUNDLE_PATTERN = re.compile(r'Bundled\*\*: `([\d.]+%)`')
+FUNDING_TIME_PATTERN = re.compile(r'@ *(\d+[a-z]+)')
+FUNDING_SOURCE_PATTERN = re.compile(r'\[(.*?)\]')
+DRAINED_PATTERN = re.compile(r'Drained (\d+) of (\d+)')
+TOP10_CONTRACT_PATTERN = re.compile(r'\[(.*?)\]\((?:https://www\.pump\.fun|https://dexscreener\.com/solana)/(.*?)\)')
+TOP10_START_PATTERN = re.compile(r'@ (\d+\.?\d*(?:K|M))')
+TOP10_END_PATTERN = re.compile(r'➜ (\d+\.?\d*(?:K|M))')
+TOP10_MULTIPLES_PATTERN = re.compile(r'Δ (\d+\.?\d*x)')
+CONTRACT_PATTERN = re.compile(r'```([\w\d]+)```')
+DEV_PATTERN = re.compile(r'\(([\d.]+%)\s*\|\s*([\d.]+)\s*◎\)')
+TTC_PATTERN = re.compile(r'`(\d+)` seconds')
+
+EXPORT_READ_SIZE = 1 << 20  # characters read from the export per refill
+PROGRESS_EVERY = 1000
+JSON_DECODER = json.JSONDecoder()
+WHITESPACE_PATTERN = re.compile(r'[ \t\n\r]*')
+NUMBER_CHARS = frozenset('0123456789.eE+-')
+
+TOP10_TITLES = (
+    "Bullish Bonding",
+    "Top 10 SOLANA Bullish Bonding",
+    "Top 10 SOLANA PF fomo calls",
+    "Top 10 SOLANA God Mode calls",
+    "Top 10 SOLANA Moon Finder calls",
+)
+
+# Function to clean and normalize text
+def clean_data(text):
+    if not text:
+        return ""
+    text = text.replace('`', '').strip()
+    return text
+
+# Function to parse Stats Creator field for Dev% and DevBal
+def parse_stats_creator_field(field_value):
+    match = DEV_PATTERN.search(clean_data(field_value))
+    if match:
+        return match.group(1), match.group(2)
+    return None, None
+
+def parse_call_message(message):
+    """Parse a feed call message into a CSV row dict, or None if it has no Stats embed."""
+    if not message.get('embeds'):
+        return None
+    embed = message['embeds'][0]
+    if 'fields' not in embed:
+        return None
+    stats_fields = {}
+    stats_name = None
+    for field in embed['fields']:
+        stats_fields[field['name']] = field['value']
+        if stats_name is None and field['name'].startswith('Stats '):
+            stats_name = field['name']
+    if stats_name is None:
+        return None
+
+    contract_match = CONTRACT_PATTERN.search(embed.get('description', ''))
+    stats_value = stats_fields.get(stats_name, '')
+    mc = MC_PATTERN.search(stats_value)
+    liq = LIQ_PATTERN.search(stats_value)
+    liq_percent = LIQ_PERCENT_PATTERN.search(stats_value)
+    b_ratio = B_RATIO_PATTERN.search(stats_value)
+    wallet_match = WALLET_PATTERN.search(stats_value)
+
+    creator_value = stats_fields.get('Stats Creator', '')
+    ag = AG_PATTERN.search(creator_value)
+    bundle = BUNDLE_PATTERN.search(creator_value)
+    funding_time = FUNDING_TIME_PATTERN.search(creator_value)
+    funding_source = FUNDING_SOURCE_PATTERN.search(creator_value)
+    dev_percent, dev_balance = parse_stats_creator_field(creator_value)
+    drained_match = DRAINED_PATTERN.search(creator_value)
+    fresh_deployer = 'Yes' if drained_match and drained_match.group(1) == '0' and drained_match.group(2) == '0' else 'No'
+
+    ttc_field = stats_fields.get('Time to completion', '')
+    ttc = TTC_PATTERN.search(ttc_field) if ttc_field else None
+
+    description = stats_fields.get('Token Description', '')
+    return {
+        'Contract': contract_match.group(1) if contract_match else '',
+        'Timestamp': message['timestamp'],
+        'Name': stats_name.split('Stats ')[1],
+        'Mcap': mc.group(1).replace(',', '') if mc else '',
+        'Liq': liq.group(1).replace(',', '') if liq else '',
+        'Liq%': liq_percent.group(1) if liq_percent else '',
+        'AG': ag.group(1) if ag else '',
+        'Bundle': bundle.group(1) if bundle else '',
+        'FundingTime': funding_time.group(1) if funding_time else '',
+        'FundingSource': funding_source.group(1) if funding_source else '',
+        'Dev%': dev_percent or '',
+        'DevBal': dev_balance or '',
+        'Links': 'Yes' if 'http' in stats_fields.get('Links', '') else 'No',
+        'F': wallet_match.group(1) if wallet_match else '0',
+        'KYC': wallet_match.group(2) if wallet_match else '0',
+        'Unq': wallet_match.group(3) if wallet_match else '0',
+        'SM': wallet_match.group(4) if wallet_match else '0',
+        'TTC': ttc.group(1) if ttc else '',
+        'B-Ratio': b_ratio.group(1) if b_ratio else '',
+        'FreshDeployer': fresh_deployer,
+        'Drained': drained_match.group(1) if drained_match else '0',
+        'Desc': 'Yes' if description and description.strip() else 'No'
+    }
+
+# Convert K/M to actual numbers for comparison
+def convert_to_float(value):
+    if not value:  # Handle empty strings
+        return 0.0
+    if 'K' in value:
+        return float(value.replace('K', '')) * 1000
+    elif 'M' in value:
+        return float(value.replace('M', '')) * 1000000
+    else:
+        return float(value)
+
+def is_top10_embed(embed):
+    title = embed.get('title', '')
+    return any(name in title for name in TOP10_TITLES)
+
+def parse_top10_lines(description):
+    """Yield (token_name, contract, start_mcap, end_mcap, profit_multiples) for each call line."""
+    for line in description.split('\n'):
+        contract_match = TOP10_CONTRACT_PATTERN.search(line)
+        if not contract_match:
+            continue
+        start_mcap = TOP10_START_PATTERN.search(line)
+        end_mcap = TOP10_END_PATTERN.search(line)
+        profit_multiples = TOP10_MULTIPLES_PATTERN.search(line)
+        yield (contract_match.group(1), contract_match.group(2),
+               start_mcap.group(1) if start_mcap else '',
+               end_mcap.group(1) if end_mcap else '',
+               profit_multiples.group(1) if profit_multiples else '')
+
+class ExportStream:
+    """Sliding text window over an export file, decoding one JSON value at a time."""
+
+    def __init__(self, file, read_size=EXPORT_READ_SIZE):
+        self.file = file
+        self.read_size = read_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def read_more(self):
+        chunk = self.file.read(self.read_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop everything already consumed so the window never grows past one value plus a chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Skip whitespace and return the next character without consuming it."""
+        while True:
+            self.pos = WHITESPACE_PATTERN.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.read_more():
+                raise ValueError("Unexpected end of export")
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(f"Malformed export: expected one of {chars!r}, found {char!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = JSON_DECODER.raw_decode(self.buffer, self.pos)
+                # Numbers are the only values not self-delimiting: one running into the
+                # window edge may continue in the next chunk
+                truncated = end == len(self.buffer) or (
+                    isinstance(value, (int, float)) and self.buffer[end] in NUMBER_CHARS)
+                if self.eof or not truncated:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.read_more()
+
+def iter_export_messages(file, read_size=EXPORT_READ_SIZE):
+    """Yield each entry of an export's top-level "messages" array without loading the whole file."""
+    stream = ExportStream(file, read_size)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.expect(':')
+        if key == 'messages':
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.pos += 1
+            else:
+                while True:
+                    yield stream.value()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            stream.value()  # guild, channel, messageCount, ... are small and unused
+        if stream.expect(',}') == '}':
+            return
+
+def stream_export(json_file_path, progress_every=PROGRESS_EVERY):
+    """Yield messages from a channel export, printing progress with messages/sec."""
+    total_bytes = os.path.getsize(json_file_path)
+    start = time.perf_counter()
+    processed_messages = 0
+
+    def report(bytes_read):
+        elapsed = max(time.perf_counter() - start, 1e-9)
+        percent = (bytes_read / total_bytes) * 100 if total_bytes else 100.0
+        print(f"Progress: {processed_messages} messages processed ({percent:.2f}% of file, {processed_messages / elapsed:,.0f} msgs/sec)")
+
+    # The watcher only hands over exports that have finished writing, so no retry loop here
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        for message in iter_export_messages(file):
+            yield message
+            processed_messages += 1
+            if processed_messages % progress_every == 0:
+                report(file.buffer.tell())
+    if processed_messages % progress_every or not processed_messages:
+        report(total_bytes)
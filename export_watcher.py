@@ -0,0 +1,154 @@
+import os
+import queue
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+SETTLE_SECONDS = 2.0  # a file must stop changing for this long before it is parsed
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+# Idle wake-up only so Ctrl+C is seen on Windows, where a blocking queue.get() cannot be interrupted
+IDLE_WAKE_SECONDS = 1.0
+
+class ExportEventHandler(FileSystemEventHandler):
+    """Forward export file events from the watchdog thread onto the watcher's queue."""
+
+    def __init__(self, events, suffix='.json'):
+        self.events = events
+        self.suffix = suffix
+
+    def forward(self, kind, path):
+        if path.endswith(self.suffix):
+            self.events.put((kind, path))
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.forward('created', event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.forward('modified', event.src_path)
+
+    def on_moved(self, event):
+        # Exports saved under a temporary name and renamed into place
+        if not event.is_directory:
+            self.forward('created', event.dest_path)
+
+def ignore_interrupts():
+    """Pool initializer: Ctrl+C stops the watcher, which lets workers finish their export."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def file_signature(path):
+    """(size, mtime) of a file, or None if it has gone away."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+def is_readable(path):
+    # Writers on Windows hold the file open exclusively until the export is complete
+    try:
+        with open(path, 'rb'):
+            return True
+    except OSError:
+        return False
+
+class ExportWatcher:
+    """Watch a folder and hand each settled export to a bounded pool of worker processes.
+
+    process is called in a worker with the export path and must be picklable (a
+    module-level function or a functools.partial of one). Files are debounced:
+    one is only submitted once its size and mtime have been stable for
+    settle_seconds and it can be opened, so half-written exports are never read.
+    write, if given, is called here in the watcher process with the path and what
+    process returned, one export at a time: the workers parse in parallel and a
+    single writer feeds the database, which only takes one writer at a time anyway.
+    An exception raised by either is printed with its export.
+    """
+
+    def __init__(self, folder_path, process, workers=MAX_WORKERS, settle_seconds=SETTLE_SECONDS, write=None):
+        self.folder_path = folder_path
+        self.process = process
+        self.write = write
+        self.workers = workers
+        self.settle_seconds = settle_seconds
+        self.events = queue.Queue()
+        self.pending = {}  # path -> (deadline, signature)
+        self.running = {}  # path -> future
+        self.rerun = set()  # paths recreated while their previous version was being processed
+
+    def arm(self, path):
+        self.pending[path] = (time.monotonic() + self.settle_seconds, file_signature(path))
+
+    def finish(self, path, future):
+        """Hand a worker's result to write, reporting a failure of either."""
+        try:
+            result = future.result()
+            if self.write:
+                self.write(path, result)
+        except Exception as e:
+            print(f"Error processing file {path}: {e!r}")
+
+    def handle_event(self, kind, path):
+        if kind == 'done':
+            future = self.running.pop(path, None)
+            if future is not None:
+                self.finish(path, future)
+            if path in self.rerun:
+                self.rerun.discard(path)
+                self.arm(path)
+        elif path in self.running:
+            if kind == 'created':
+                self.rerun.add(path)
+        elif kind == 'created' or path in self.pending:
+            # Modifications only push back the deadline of files already waiting
+            self.arm(path)
+
+    def submit_settled(self, pool):
+        now = time.monotonic()
+        for path, (deadline, signature) in list(self.pending.items()):
+            if deadline > now:
+                continue
+            current = file_signature(path)
+            if current is None:
+                del self.pending[path]
+            elif current != signature or not is_readable(path):
+                self.arm(path)
+            else:
+                del self.pending[path]
+                future = pool.submit(self.process, path)
+                future.add_done_callback(lambda f, path=path: self.events.put(('done', path)))
+                self.running[path] = future
+
+    def next_timeout(self):
+        if not self.pending:
+            return IDLE_WAKE_SECONDS
+        deadline = min(deadline for deadline, _ in self.pending.values())
+        return min(max(deadline - time.monotonic(), 0), IDLE_WAKE_SECONDS)
+
+    def run(self):
+        """Block until Ctrl+C, processing exports as they settle."""
+        observer = Observer()
+        observer.schedule(ExportEventHandler(self.events), self.folder_path, recursive=False)
+        observer.start()
+        print(f"Watching folder: {self.folder_path} ({self.workers} workers)")
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=ignore_interrupts)
+        try:
+            while True:
+                try:
+                    self.handle_event(*self.events.get(timeout=self.next_timeout()))
+                except queue.Empty:
+                    pass
+                self.submit_settled(pool)
+        except KeyboardInterrupt:
+            print("Stopping watcher...")
+        finally:
+            observer.stop()
+            observer.join()
+            # Exports already handed to the pool are finished, then written before exiting
+            pool.shutdown(wait=True)
+            for path, future in list(self.running.items()):
+                self.finish(path, future)
+            self.running.clear()
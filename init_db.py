@@ -2,241 +2,1119 @@ import pandas as pd
 import sqlite3
 import os
 import json
+import hashlib
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from config import DATA_DIRECTORY
+from utils import fundtime_hours
+from wallet_signals import SIGNAL_TABLES, mark_signals_dirty, rollback_signals, reset_signals, sync_all_signals
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
-def init_database(force_rebuild=False):
+WRITE_BATCH_SIZE = 5000
+BULK_BATCH_SIZE = 100000
+STREAM_CHUNK_SIZE = 50000
+HASH_CHUNK_SIZE = 1024 * 1024
+SQL_VARIABLE_LIMIT = 900  # stays under SQLite's default of 999 host parameters
+
+FEED_NUMERIC_COLS = ["Mcap", "Liq", "AG", "DevBal", "F", "KYC", "Unq", "SM", "TTC", "Drained"]
+FEED_PERCENT_COLS = ["Liq%", "Bundle", "Dev%", "B-Ratio"]
+FEED_STRING_COLS = ["Name", "FundingTime", "FundingSource", "Links", "FreshDeployer", "Desc"]
+FEED_COLUMNS = ['token', 'Date', 'Name', 'Mcap', 'Liq', 'Liq%', 'AG', 'Bundle',
+                'FundingTime', 'FundingSource', 'Funding', 'FundingHours', 'Dev%', 'DevBal', 'Links',
+                'F', 'KYC', 'Unq', 'SM', 'TTC', 'B-Ratio', 'FreshDeployer', 'Drained', 'Desc']
+TOP_NUMERIC_COLS = ['Mcap', 'HighestMcap', 'Multiples']
+TOP_COLUMNS = ['Contract', 'Name', 'Mcap', 'HighestMcap', 'Multiples']
+MCAPS_COLUMNS = ['token', 'Mcap', 'MaxMcap']
+# Tables table_catalog does not describe: MCAPS and the bookkeeping tables
+CATALOG_EXCLUDED = ['mcaps', 'ingest_manifest', 'upsert_sources', 'tokens', 'table_catalog'] + SIGNAL_TABLES
+
+# Parsed frames carry full contract addresses in this column; tables store tokens.token_id
+TOKEN_COLUMNS = {'regular': 'token', 'top': 'Contract', 'mcaps': 'token'}
+# Regular feeds are append-only; a call is identified by its token and timestamp
+FEED_KEY = ('token_id', 'Date')
+# Upsert tables keep one row per key; the key column and the column whose larger value wins
+UPSERT_KEYS = {'top': ('token_id', 'HighestMcap', ('Multiples', 'source_id')),
+               'mcaps': ('token_id', 'MaxMcap', ('source_id',))}
+
+def sqlite_ready(df):
+    """Convert datetime columns to the ISO text to_sql writes, so the writer only binds values."""
+    if df is None:
+        return None
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].astype(str).where(df[col].notna(), None)
+    return df
+
+def frame_rows(df):
+    """Yield DataFrame rows as plain tuples for sqlite3 (NaN binds as NULL, NA becomes None)."""
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and series.hasnans:
+            series = series.astype(object).where(series.notna(), None)
+        columns.append(series.tolist())
+    return zip(*columns)
+
+def execute_batches(cursor, sql, df, batch_size=WRITE_BATCH_SIZE):
+    """Run sql for every row of df in batches; returns the number of rows changed."""
+    rows = frame_rows(df)
+    changed = 0
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            break
+        cursor.executemany(sql, batch)
+        changed += cursor.rowcount
+    return changed
+
+def bulk_insert(cursor, table, df, batch_size=WRITE_BATCH_SIZE, ignore=False):
+    """Append df to table; with ignore=True rows violating a unique key are skipped. Returns rows inserted."""
+    col_list = ", ".join(f'"{col}"' for col in df.columns)
+    placeholders = ", ".join("?" for _ in df.columns)
+    verb = "INSERT OR IGNORE" if ignore else "INSERT"
+    return execute_batches(cursor, f"{verb} INTO {table} ({col_list}) VALUES ({placeholders})", df, batch_size)
+
+def bulk_upsert(cursor, table, df, key, max_col, follow_cols=(), batch_size=WRITE_BATCH_SIZE):
+    """Upsert df into table with batched executemany.
+
+    On a key conflict the larger max_col wins: follow_cols are only taken from
+    the incoming row when it raises max_col, every other column is overwritten.
+    """
+    columns = list(df.columns)
+    col_list = ", ".join(f'"{col}"' for col in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    raises_max = f'excluded."{max_col}" > "{max_col}" OR "{max_col}" IS NULL'
+    updates = []
+    for col in columns:
+        if col == key:
+            continue
+        if col == max_col or col in follow_cols:
+            updates.append(f'"{col}" = CASE WHEN {raises_max} THEN excluded."{col}" ELSE "{col}" END')
+        else:
+            updates.append(f'"{col}" = excluded."{col}"')
+    sql = f"""
+        INSERT INTO {table} ({col_list}) VALUES ({placeholders})
+        ON CONFLICT("{key}") DO UPDATE SET {", ".join(updates)}
+    """
+    return execute_batches(cursor, sql, df, batch_size)
+
+def short_token(value):
+    return f"{str(value)[:8]}..." if len(str(value)) > 8 else str(value)
+
+def classify_csv(filename):
+    """Return (kind, table) for a CSV in the data directory."""
+    if filename.lower().startswith('mcaps-'):
+        return 'mcaps', 'mcaps'
+    feed_name = filename.replace('.csv', '').split('-')[0].lower().replace(' ', '_')
+    if '10' in filename.split('-')[0].lower():
+        return 'top', feed_name
+    return 'regular', feed_name
+
+def normalize_feed(df, file):
+    if 'Contract' in df.columns:
+        df = df.rename(columns={'Contract': 'token'})
+    elif 'contract' in df.columns:
+        df = df.rename(columns={'contract': 'token'})
+    if 'token' not in df.columns:
+        print(f"Warning: No 'token' or 'contract' column in {file}. Skipping.")
+        return None
+    if 'token_name' in df.columns:
+        df = df.rename(columns={'token_name': 'Name'})
+    for col in FEED_NUMERIC_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].replace('[\\$,]', '', regex=True), errors='coerce')
+    
+    for col in FEED_PERCENT_COLS:
+        if col in df.columns:
+            df[col] = df[col].replace({'%': ''}, regex=True).astype(float) / 100
+    
+    if 'Timestamp' in df.columns:
+        df['Date'] = pd.to_datetime(df['Timestamp'], errors='coerce')
+        df = df.drop(columns=['Timestamp'], errors='ignore')
+    
+    for col in FEED_STRING_COLS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).fillna('')
+    
+    if 'FundingTime' in df.columns and 'FundingSource' in df.columns:
+        df['Funding'] = df['FundingTime'] + ' (' + df['FundingSource'] + ')'
+    
+    for col in FEED_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0.0 if col in FEED_NUMERIC_COLS or col in FEED_PERCENT_COLS else ''
+    # Wallets and filters compare funding in hours; NaN where FundingTime does not parse
+    df['FundingHours'] = fundtime_hours(df['FundingTime'])
+    return df[FEED_COLUMNS]
+
+def normalize_top(df, file):
+    if 'Contract' not in df.columns and 'contract' in df.columns:
+        df = df.rename(columns={'contract': 'Contract'})
+    if 'Contract' not in df.columns:
+        print(f"Warning: No 'Contract' or 'contract' column in {file}. Skipping.")
+        return None
+    if 'token_name' in df.columns:
+        df = df.rename(columns={'token_name': 'Name'})
+    if 'start_mcap' in df.columns and 'end_mcap' in df.columns:
+        df = df.rename(columns={'start_mcap': 'Mcap', 'end_mcap': 'HighestMcap', 'profit_multiples': 'Multiples'})
+    for col in ['Mcap', 'HighestMcap']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    if 'Multiples' in df.columns:
+        df['Multiples'] = pd.to_numeric(df['Multiples'].str.replace('x', ''), errors='coerce')
+    if 'Name' in df.columns:
+        df['Name'] = df['Name'].astype(str).fillna('')
+    
+    for col in TOP_COLUMNS:
+        if col not in df.columns:
+            df[col] = 0.0 if col in TOP_NUMERIC_COLS else ''
+    return df[TOP_COLUMNS]
+
+def normalize_mcaps(df, file):
+    if 'token' not in df.columns and 'contract' in df.columns:
+        df = df.rename(columns={'contract': 'token'})
+    if 'token' not in df.columns:
+        print(f"Warning: No 'token' or 'contract' column in {file}. Skipping.")
+        return None
+    if 'market_cap_usd' in df.columns:
+        df['Mcap'] = pd.to_numeric(df['market_cap_usd'].replace('[\\$,]', '', regex=True), errors='coerce')
+    if 'max_market_cap_usd' in df.columns:
+        df['MaxMcap'] = pd.to_numeric(df['max_market_cap_usd'].replace('[\\$,]', '', regex=True), errors='coerce')
+    return df[MCAPS_COLUMNS].dropna(subset=['token'])
+
+NORMALIZERS = {'regular': normalize_feed, 'top': normalize_top, 'mcaps': normalize_mcaps}
+
+def load_feed_csv(file):
+    return normalize_feed(pd.read_csv(file), file)
+
+def load_top_csv(file):
+    return normalize_top(pd.read_csv(file), file)
+
+def load_mcaps_csv(file):
+    return normalize_mcaps(pd.read_csv(file), file)
+
+LOADERS = {'regular': load_feed_csv, 'top': load_top_csv, 'mcaps': load_mcaps_csv}
+
+def current_rss():
+    """Resident set size of this process in bytes, or None without psutil."""
+    return psutil.Process().memory_info().rss if psutil else None
+
+def format_rss(rss):
+    return f"{rss / (1024 * 1024):,.1f} MB" if rss is not None else "n/a (install psutil)"
+
+def parse_file(kind, path):
+    """Load, normalise and prepare one CSV for insert; runs in the worker processes when --jobs > 1."""
+    start = time.perf_counter()
+    df = sqlite_ready(LOADERS[kind](path))
+    return df, time.perf_counter() - start
+
+def stream_file(kind, path, chunksize=STREAM_CHUNK_SIZE):
+    """Yield (chunk, parse_seconds) for one CSV read and normalised chunksize rows at a time.
+
+    Yields a single None chunk when the file is unusable.
+    """
+    start = time.perf_counter()
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        df = sqlite_ready(NORMALIZERS[kind](chunk, path))
+        yield df, time.perf_counter() - start
+        if df is None:
+            return
+        start = time.perf_counter()
+
+def parse_files(items, jobs=1):
+    """Yield (item, df, parse_seconds) in input order.
+
+    With jobs > 1 files are parsed in a process pool, at most 2 * jobs ahead of
+    the single writer consuming this generator.
+    """
+    if jobs <= 1:
+        for item in items:
+            yield (item, *parse_file(item['kind'], os.path.join(DATA_DIRECTORY, item['path'])))
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending = deque()
+        for item in items:
+            pending.append((item, executor.submit(parse_file, item['kind'], os.path.join(DATA_DIRECTORY, item['path']))))
+            if len(pending) >= 2 * jobs:
+                item, future = pending.popleft()
+                yield (item, *future.result())
+        while pending:
+            item, future = pending.popleft()
+            yield (item, *future.result())
+
+def ensure_column(cursor, table, column, decl):
+    """Add column to table unless it is there; True if it was added."""
+    cursor.execute(f"PRAGMA table_info({table})")
+    if column in [col[1] for col in cursor.fetchall()]:
+        return False
+    cursor.execute(f'ALTER TABLE {table} ADD COLUMN "{column}" {decl}')
+    return True
+
+def fill_funding_hours(cursor, table):
+    """Set FundingHours from FundingTime on the rows of table where it is NULL; returns the rows filled.
+
+    Rows whose FundingTime does not parse stay NULL. Stored wallet signals of a feed
+    that changed are dropped, so the next sync decides its rows on the filled hours.
+    """
+    # Each distinct FundingTime is parsed once and joined back through a keyed temp table
+    cursor.execute(f"SELECT DISTINCT FundingTime FROM {table} WHERE FundingHours IS NULL AND FundingTime IS NOT NULL")
+    fundtimes = [row[0] for row in cursor.fetchall()]
+    hours = fundtime_hours(pd.Series(fundtimes, dtype=object))
+    parsed = [(fundtime, hour) for fundtime, hour in zip(fundtimes, hours.tolist()) if hour == hour]
+    if not parsed:
+        return 0
+    cursor.execute("CREATE TEMP TABLE funding_hours (FundingTime TEXT PRIMARY KEY, hours REAL)")
+    cursor.executemany("INSERT INTO funding_hours VALUES (?, ?)", parsed)
+    cursor.execute(f"""UPDATE {table} SET FundingHours = (SELECT hours FROM funding_hours h WHERE h.FundingTime = {table}.FundingTime)
+                       WHERE FundingHours IS NULL AND FundingTime IN (SELECT FundingTime FROM funding_hours)""")
+    filled = cursor.rowcount
+    cursor.execute("DROP TABLE funding_hours")
+    reset_signals(cursor, table)
+    return filled
+
+def add_funding_hours(cursor, table):
+    """Add FundingHours to a feed stored without it, backfilled from FundingTime; True if added."""
+    if not ensure_column(cursor, table, 'FundingHours', 'REAL'):
+        return False
+    fill_funding_hours(cursor, table)
+    return True
+
+def migrate_funding_hours(cursor):
+    """Backfill FundingHours into every regular feed stored before it; returns the feeds changed.
+
+    Also fills the column where it exists but was left NULL, as rows copied by the
+    token id migration were before it backfilled them.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    feeds = [table for (table,) in cursor.fetchall() if {'token_id', 'Date', 'FundingTime'} <= set(table_columns(cursor, table))]
+    return [table for table in feeds if add_funding_hours(cursor, table) or fill_funding_hours(cursor, table)]
+
+def create_token_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS tokens (
+            token_id INTEGER PRIMARY KEY,
+            address TEXT UNIQUE NOT NULL
+        )
+    """)
+
+def token_ids(cursor, addresses, cache):
+    """Map a Series of contract addresses to tokens.token_id, registering unseen ones.
+
+    cache is an {address: token_id} dict reused across the frames of one run.
+    """
+    new = [address for address in addresses.dropna().unique() if address not in cache]
+    if new:
+        # Rows migrated from the truncated-key schema only know the short form; the
+        # first full address with that prefix takes their id over
+        cursor.executemany("UPDATE OR IGNORE tokens SET address = ? WHERE address = ?",
+                           [(address, short_token(address)) for address in new if short_token(address) != address])
+        cursor.executemany("INSERT OR IGNORE INTO tokens (address) VALUES (?)", [(address,) for address in new])
+        for start in range(0, len(new), SQL_VARIABLE_LIMIT):
+            chunk = new[start:start + SQL_VARIABLE_LIMIT]
+            cursor.execute(f"SELECT address, token_id FROM tokens WHERE address IN ({','.join('?' * len(chunk))})", chunk)
+            cache.update(cursor.fetchall())
+    return addresses.map(cache).astype('Int64')
+
+def with_token_ids(cursor, kind, df, cache):
+    """Replace the address column of a parsed frame with token_id."""
+    column = TOKEN_COLUMNS[kind]
+    ids = token_ids(cursor, df[column], cache)
+    df = df.drop(columns=[column]).assign(token_id=ids)
+    if kind != 'regular':
+        # The upsert key is an INTEGER PRIMARY KEY, where NULL would allocate a fresh id
+        df = df[df['token_id'].notna()]
+    return df
+
+def table_columns(cursor, table):
+    cursor.execute(f"PRAGMA table_info({table})")
+    return [col[1] for col in cursor.fetchall()]
+
+def legacy_kind(table, columns):
+    """Kind of a table still keyed by truncated token strings, or None."""
+    if 'token_id' in columns:
+        return None
+    if table == 'mcaps' and 'token' in columns:
+        return 'mcaps'
+    if 'Contract' in columns:
+        return 'top'
+    if 'token' in columns and 'Date' in columns:
+        return 'regular'
+    return None
+
+def upgrade_token_table(cursor, kind, table):
+    """Rebuild a table keyed by truncated token strings around tokens.token_id.
+
+    Each legacy string becomes a tokens row of its own until a full address with
+    that prefix is ingested. Regular feeds are deduplicated on the way (first copy
+    wins); returns the number of duplicate rows dropped.
+    """
+    text_column = 'Contract' if kind == 'top' else 'token'
+    create_token_table(cursor)
+    cursor.execute(f"INSERT OR IGNORE INTO tokens (address) SELECT DISTINCT {text_column} FROM {table} WHERE {text_column} IS NOT NULL")
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name = ? AND sql IS NOT NULL", (table,))
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP INDEX {name}")
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+    create_table(cursor, kind, table)
+    legacy_columns = table_columns(cursor, f"{table}_legacy")
+    shared = [col for col in table_columns(cursor, table) if col in legacy_columns]
+    col_list = ", ".join(f'"{col}"' for col in shared)
+    select_list = ", ".join(f'l."{col}"' for col in shared)
+    cursor.execute(f"SELECT COUNT(*) FROM {table}_legacy")
+    legacy_rows = cursor.fetchone()[0]
+    cursor.execute(f"""
+        INSERT OR IGNORE INTO {table} ({col_list}, token_id)
+        SELECT {select_list}, tokens.token_id FROM {table}_legacy AS l
+        LEFT JOIN tokens ON tokens.address = l.{text_column}
+        ORDER BY l.rowid
+    """)
+    dropped = legacy_rows - cursor.rowcount
+    cursor.execute(f"DROP TABLE {table}_legacy")
+    if kind == 'regular':
+        # The legacy table had no FundingHours to copy, and its rows were renumbered
+        fill_funding_hours(cursor, table)
+        reset_signals(cursor, table)
+        sync_enriched(cursor, table)
+    else:
+        cursor.execute(f"SELECT token_id FROM {table}")
+        refresh_enriched(cursor, kind, table, [row[0] for row in cursor.fetchall()])
+    return dropped
+
+def migrate_legacy_tables(cursor):
+    """One-time move of every table keyed by truncated token strings onto token ids.
+
+    Returns {table: duplicate rows removed} for the regular feeds migrated by this call.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT IN ('tokens', 'ingest_manifest')")
+    removed = {}
+    for (table,) in cursor.fetchall():
+        kind = legacy_kind(table, table_columns(cursor, table))
+        if kind:
+            dropped = upgrade_token_table(cursor, kind, table)
+            if kind == 'regular':
+                removed[table] = dropped
+    return removed
+
+def create_table(cursor, kind, table):
+    create_token_table(cursor)
+    if legacy_kind(table, table_columns(cursor, table)):
+        dropped = upgrade_token_table(cursor, kind, table)
+        print(f"Moved {table} onto token ids" + (f", removing {dropped} duplicate rows" if dropped else ""))
+        return
+    if kind == 'regular':
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                token_id INTEGER,
+                Date DATETIME,
+                Name TEXT,
+                Mcap REAL,
+                Liq REAL,
+                "Liq%" REAL,
+                AG REAL,
+                Bundle REAL,
+                FundingTime TEXT,
+                FundingSource TEXT,
+                Funding TEXT,
+                FundingHours REAL,
+                "Dev%" REAL,
+                DevBal REAL,
+                Links TEXT,
+                F REAL,
+                KYC REAL,
+                Unq REAL,
+                SM REAL,
+                TTC REAL,
+                "B-Ratio" REAL,
+                FreshDeployer TEXT,
+                Drained REAL,
+                Desc TEXT,
+                source_id INTEGER
+            )
+        """)
+    elif kind == 'top':
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                token_id INTEGER PRIMARY KEY,
+                Name TEXT,
+                Mcap REAL,
+                HighestMcap REAL,
+                Multiples REAL,
+                source_id INTEGER
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS mcaps (
+                token_id INTEGER PRIMARY KEY,
+                Mcap REAL,
+                MaxMcap REAL,
+                source_id INTEGER
+            )
+        """)
+    # Tables created before the ingest manifest have no provenance column
+    ensure_column(cursor, table, 'source_id', 'INTEGER')
+    if kind != 'regular':
+        create_upsert_sources_table(cursor)
+    if kind == 'regular':
+        add_funding_hours(cursor, table)
+        # Unique (token_id, Date): appends skip calls already stored. NULL keys never conflict.
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_key ON {table} (token_id, Date)")
+        create_enriched_table(cursor, table)
+
+def create_indexes(cursor, table):
+    columns = table_columns(cursor, table)
+    # token_id lookups use the (token_id, Date) key of regular feeds and the primary key of the others
+    if 'Date' in columns:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (Date)")
+    if 'source_id' in columns:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_source ON {table} (source_id)")
+    if 'FundingHours' in columns:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_funding ON {table} (FundingHours)")
+
+def drop_indexes(cursor, table):
+    """Drop the secondary indexes of table.
+
+    Primary key autoindexes (no sql) and unique keys stay, so conflict handling still works.
+    """
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name = ? AND sql IS NOT NULL "
+                   "AND sql NOT LIKE 'CREATE UNIQUE%'", (table,))
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP INDEX {name}")
+
+def enriched_select(cursor, feed):
+    """SELECT yielding {feed}_enriched rows (feed rowid, token_id, MaxMcap, X's) for feed f.
+
+    MaxMcap is the Top table's HighestMcap, else the MCAPS MaxMcap, else the call's own
+    Mcap; X's is MaxMcap / Mcap, 0 where that is undefined. Only tables already keyed
+    by token_id are joined; the others are folded in when they are created or migrated.
+    """
+    joins = []
+    sources = []
+    if 'token_id' in table_columns(cursor, f"{feed}10"):
+        joins.append(f"LEFT JOIN {feed}10 t ON t.token_id = f.token_id")
+        sources.append("t.HighestMcap")
+    if 'token_id' in table_columns(cursor, 'mcaps'):
+        joins.append("LEFT JOIN mcaps m ON m.token_id = f.token_id")
+        sources.append("m.MaxMcap")
+    max_mcap = f"COALESCE({', '.join(sources)}, f.Mcap)" if sources else "f.Mcap"
+    return f"""
+        SELECT f.rowid, f.token_id, {max_mcap}, COALESCE({max_mcap} / NULLIF(f.Mcap, 0), 0)
+        FROM {feed} f {' '.join(joins)}
+    """
+
+def create_enriched_table(cursor, feed):
+    """Create {feed}_enriched if needed and bring it up to date with the feed's new rows."""
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {feed}_enriched (
+            feed_rowid INTEGER PRIMARY KEY,
+            token_id INTEGER,
+            MaxMcap REAL,
+            "X's" REAL
+        )
+    """)
+    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{feed}_enriched_token ON {feed}_enriched (token_id)")
+    sync_enriched(cursor, feed)
+
+def sync_enriched(cursor, feed):
+    """Resolve the feed rows appended since the last sync; feeds only grow at the rowid end."""
+    cursor.execute(f"""
+        INSERT OR REPLACE INTO {feed}_enriched (feed_rowid, token_id, MaxMcap, "X's")
+        {enriched_select(cursor, feed)}
+        WHERE f.rowid > (SELECT COALESCE(MAX(feed_rowid), 0) FROM {feed}_enriched)
+    """)
+    return cursor.rowcount
+
+def enriched_feeds(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%\\_enriched' ESCAPE '\\'")
+    return [name[:-len('_enriched')] for (name,) in cursor.fetchall()]
+
+def refresh_enriched(cursor, kind, table, ids):
+    """Re-resolve the enriched rows of the tokens whose Top or MCAPS row changed.
+
+    A Top table only feeds the enriched table of its own feed, MCAPS feeds all of them.
+    """
+    ids = {int(token_id) for token_id in ids if pd.notna(token_id)}
+    if not ids:
+        return
+    feeds = enriched_feeds(cursor)
+    if kind == 'top':
+        feeds = [feed for feed in feeds if feed == table.replace('10', '')]
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS enrich_tokens (token_id INTEGER PRIMARY KEY)")
+    cursor.execute("DELETE FROM enrich_tokens")
+    cursor.executemany("INSERT OR IGNORE INTO enrich_tokens (token_id) VALUES (?)", [(token_id,) for token_id in ids])
+    for feed in feeds:
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO {feed}_enriched (feed_rowid, token_id, MaxMcap, "X's")
+            {enriched_select(cursor, feed)}
+            WHERE f.token_id IN (SELECT token_id FROM enrich_tokens)
+        """)
+        # Wallets deciding on X's take these rows again at the next signal sync
+        mark_signals_dirty(cursor, feed, f"SELECT feed_rowid FROM {feed}_enriched WHERE token_id IN (SELECT token_id FROM enrich_tokens)")
+    cursor.execute("DELETE FROM enrich_tokens")
+
+def create_feed_view(cursor, feed):
+    """Create {feed}_view, or recreate it if its definition changed; returns the view name.
+
+    The view is the feed with its addresses and the precomputed MaxMcap and X's of
+    {feed}_enriched (a rowid join, kept current by ingest). feed_rowid is exposed so
+    pages can be read with keyset pagination on (Date, feed_rowid).
+    """
+    view = f"{feed}_view"
+    create_enriched_table(cursor, feed)
+    columns = ', '.join(f'f."{col}"' for col in FEED_COLUMNS[1:])
+    sql = f"""CREATE VIEW {view} AS
+        SELECT tokens.address AS token, f.token_id, {columns}, e.MaxMcap, e."X's", f.rowid AS feed_rowid
+        FROM {feed} f
+        LEFT JOIN tokens ON tokens.token_id = f.token_id
+        LEFT JOIN {feed}_enriched e ON e.feed_rowid = f.rowid"""
+    cursor.execute("SELECT sql FROM sqlite_master WHERE type='view' AND name = ?", (view,))
+    row = cursor.fetchone()
+    if row is None or row[0] != sql:
+        cursor.execute(f"DROP VIEW IF EXISTS {view}")
+        cursor.execute(sql)
+    return view
+
+def create_feed_views(cursor):
+    """Bring the enriched table and view of every regular feed up to date."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    for (table,) in cursor.fetchall():
+        columns = table_columns(cursor, table)
+        if 'token_id' in columns and 'Date' in columns:
+            create_feed_view(cursor, table)
+
+def create_catalog_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS table_catalog (
+            table_name TEXT PRIMARY KEY,
+            kind TEXT,
+            row_count INTEGER,
+            min_date TEXT,
+            max_date TEXT,
+            columns TEXT,
+            pair TEXT,
+            view_name TEXT,
+            updated_at DATETIME
+        )
+    """)
+
+def catalog_tables(cursor):
+    """The feed and Top tables the CLI lists, in creation order."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%' "
+                   "AND name NOT LIKE '%\\_enriched' ESCAPE '\\' ORDER BY rowid")
+    return [name for (name,) in cursor.fetchall() if name not in CATALOG_EXCLUDED]
+
+def catalog_layout(cursor, table, tables):
+    """(kind, columns, pair, view) of a table; pair is a feed's Top table or a Top table's feed."""
+    columns = table_columns(cursor, table)
+    kind = 'top' if table.endswith('10') else 'regular'
+    pair = table.replace('10', '') if kind == 'top' else f"{table}10"
+    view = None
+    if kind == 'regular':
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name = ?", (f"{table}_view",))
+        view = f"{table}_view" if cursor.fetchone() else None
+    return kind, columns, pair if pair in tables else None, view
+
+def catalog_stats(cursor, table, columns):
+    """(row_count, min_date, max_date); the dates come off the Date index."""
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    row_count = cursor.fetchone()[0]
+    if 'Date' not in columns:
+        return row_count, None, None
+    cursor.execute(f"SELECT MIN(Date) FROM {table}")
+    min_date = cursor.fetchone()[0]
+    cursor.execute(f"SELECT MAX(Date) FROM {table}")
+    return row_count, min_date, cursor.fetchone()[0]
+
+def refresh_catalog(cursor, changed=()):
+    """Bring table_catalog up to date in the ingest transaction.
+
+    Row counts and dates are recounted for the changed tables and for tables that
+    are new or changed shape; every other entry only has its pairing and view
+    rechecked. Entries of dropped tables are removed.
+    """
+    create_catalog_table(cursor)
+    tables = catalog_tables(cursor)
+    cursor.execute("SELECT table_name, columns FROM table_catalog")
+    stored = dict(cursor.fetchall())
+    cursor.executemany("DELETE FROM table_catalog WHERE table_name = ?", [(name,) for name in stored if name not in tables])
+    now = datetime.now().isoformat()
+    for table in tables:
+        kind, columns, pair, view = catalog_layout(cursor, table, tables)
+        if table in changed or stored.get(table) != json.dumps(columns):
+            # Upserting keeps the entry's rowid, so the catalog stays in creation order
+            cursor.execute("""
+                INSERT INTO table_catalog (table_name, kind, row_count, min_date, max_date, columns, pair, view_name, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(table_name) DO UPDATE SET kind = excluded.kind, row_count = excluded.row_count,
+                    min_date = excluded.min_date, max_date = excluded.max_date, columns = excluded.columns,
+                    pair = excluded.pair, view_name = excluded.view_name, updated_at = excluded.updated_at
+            """, (table, kind, *catalog_stats(cursor, table, columns), json.dumps(columns), pair, view, now))
+        else:
+            cursor.execute("UPDATE table_catalog SET kind = ?, pair = ?, view_name = ? WHERE table_name = ?",
+                           (kind, pair, view, table))
+
+def begin_bulk_load(conn):
+    """WAL, no fsync and a large page cache for the duration of a backfill.
+
+    Returns the journal mode and synchronous setting to hand back to end_bulk_load.
+    """
+    prior = (conn.execute("PRAGMA journal_mode").fetchone()[0], conn.execute("PRAGMA synchronous").fetchone()[0])
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-262144")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return prior
+
+def end_bulk_load(conn, prior):
+    """ANALYZE, then restore the settings begin_bulk_load replaced.
+
+    journal_mode=WAL persists in the database file, so data.db goes back to its
+    prior mode rather than staying in WAL for every later reader and writer.
+    """
+    journal_mode, synchronous = prior
+    conn.execute("ANALYZE")
+    conn.commit()
+    try:
+        conn.execute(f"PRAGMA journal_mode={journal_mode}")
+    except sqlite3.OperationalError as e:
+        # Leaving WAL needs data.db to itself, e.g. no CLI session reading it
+        print(f"Warning: data.db stays in WAL mode, another connection has it open ({e})")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def create_manifest_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_manifest (
+            source_id INTEGER PRIMARY KEY,
+            content_hash TEXT UNIQUE,
+            path TEXT,
+            size INTEGER,
+            mtime REAL,
+            kind TEXT,
+            table_name TEXT,
+            row_count INTEGER,
+            ingested_at DATETIME,
+            origin TEXT DEFAULT 'csv'
+        )
+    """)
+    # origin is 'csv' for files in the data directory, 'export' for Discord exports written directly
+    ensure_column(cursor, 'ingest_manifest', 'origin', "TEXT DEFAULT 'csv'")
+
+def add_manifest_entry(cursor, content_hash, path, size, mtime, kind, table, row_count=0, origin='csv'):
+    cursor.execute("""
+        INSERT INTO ingest_manifest (content_hash, path, size, mtime, kind, table_name, row_count, ingested_at, origin)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (content_hash, path, size, mtime, kind, table, row_count, datetime.now().isoformat(), origin))
+    return cursor.lastrowid
+
+def create_upsert_sources_table(cursor):
+    """Create upsert_sources, every (source, Top/MCAPS table, token_id) a source wrote.
+
+    An upsert row only keeps the source_id of the file with the largest max column,
+    but every file writing the key overwrote its other columns, so a rollback has to
+    free each key its file wrote. A database predating the table is seeded from the
+    source_id of each row, all that was recorded before.
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='upsert_sources'")
+    if cursor.fetchone():
+        return
+    cursor.execute("""
+        CREATE TABLE upsert_sources (
+            source_id INTEGER,
+            table_name TEXT,
+            token_id INTEGER,
+            PRIMARY KEY (source_id, table_name, token_id)
+        ) WITHOUT ROWID
+    """)
+    create_manifest_table(cursor)
+    cursor.execute("SELECT DISTINCT table_name FROM ingest_manifest WHERE kind IN ('top', 'mcaps')")
+    for (table,) in cursor.fetchall():
+        if 'token_id' in table_columns(cursor, table):
+            cursor.execute(f"INSERT OR IGNORE INTO upsert_sources SELECT source_id, ?, token_id FROM {table} "
+                           "WHERE source_id IS NOT NULL", (table,))
+
+def load_manifest(cursor, origin='csv'):
+    cursor.execute("SELECT source_id, content_hash, path, size, mtime, kind, table_name, row_count FROM ingest_manifest WHERE origin = ? ORDER BY source_id", (origin,))
+    keys = ['source_id', 'content_hash', 'path', 'size', 'mtime', 'kind', 'table_name', 'row_count']
+    return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+def seed_manifest(cursor, processed_file):
+    """Adopt files listed in the old mtime-based processed_files.json so they are not re-appended.
+
+    Their rows were written before provenance existed (source_id is NULL), so they
+    are skipped while unchanged but cannot be rolled back.
+    """
+    with open(processed_file, 'r') as f:
+        processed_files = json.load(f)
+    seeded = 0
+    for full_path, mtime in processed_files.items():
+        filename = os.path.basename(full_path)
+        path = os.path.join(DATA_DIRECTORY, filename)
+        if not os.path.exists(path) or os.path.getmtime(path) > mtime:
+            continue
+        kind, table = classify_csv(filename)
+        stat = os.stat(path)
+        content_hash = file_hash(path)
+        cursor.execute("SELECT 1 FROM ingest_manifest WHERE content_hash = ?", (content_hash,))
+        if cursor.fetchone():
+            continue
+        add_manifest_entry(cursor, content_hash, filename, stat.st_size, stat.st_mtime, kind, table, row_count=None)
+        seeded += 1
+    print(f"Seeded ingest manifest with {seeded} files from processed_files.json (rows without provenance).")
+
+def scan_data_directory(manifest, filenames):
+    """Split CSVs into unchanged, to-ingest and removed against the manifest.
+
+    Files whose size and mtime match their manifest entry are not read. Others are
+    hashed: a known hash is a touched, renamed or duplicated file, an unknown one is
+    new content (replacing the entry previously recorded for that path, if any).
+    """
+    by_path = {entry['path']: entry for entry in manifest}
+    by_hash = {entry['content_hash']: entry for entry in manifest}
+    present = set(filenames)
+    unchanged, to_ingest, touched, duplicates = [], [], [], []
+    claimed = set()
+    for filename in filenames:
+        stat = os.stat(os.path.join(DATA_DIRECTORY, filename))
+        entry = by_path.get(filename)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            unchanged.append(entry)
+            claimed.add(entry['source_id'])
+            continue
+        content_hash = file_hash(os.path.join(DATA_DIRECTORY, filename))
+        known = by_hash.get(content_hash)
+        if known and (known['path'] == filename or known['path'] not in present) and known['source_id'] not in claimed:
+            touched.append((known, filename, stat))
+            claimed.add(known['source_id'])
+        elif known:
+            duplicates.append((filename, known['path']))
+        else:
+            kind, table = classify_csv(filename)
+            to_ingest.append({'path': filename, 'content_hash': content_hash, 'size': stat.st_size,
+                              'mtime': stat.st_mtime, 'kind': kind, 'table_name': table})
+    ingest_paths = {item['path'] for item in to_ingest}
+    removed = [entry for entry in manifest
+               if entry['source_id'] not in claimed and (entry['path'] not in present or entry['path'] in ingest_paths)]
+    return unchanged, to_ingest, touched, duplicates, removed
+
+def rollback_source(cursor, entry):
+    """Delete the rows a manifest entry produced; returns the keys it freed for other sources."""
+    table = entry['table_name']
+    if entry['row_count'] == 0:
+        return set()
+    if entry['row_count'] is None:
+        print(f"Warning: {entry['path']} predates the ingest manifest; its rows in {table} cannot be removed.")
+        return set()
+    if entry['kind'] == 'regular':
+        # Overlapping exports had their copies of these calls ignored, so they may refill them
+        cursor.execute(f"SELECT token_id, Date FROM {table} WHERE source_id = ? AND token_id IS NOT NULL AND Date IS NOT NULL",
+                       (entry['source_id'],))
+        keys = set(cursor.fetchall())
+        create_enriched_table(cursor, table)
+        cursor.execute(f"DELETE FROM {table}_enriched WHERE feed_rowid IN (SELECT rowid FROM {table} WHERE source_id = ?)",
+                       (entry['source_id'],))
+        rollback_signals(cursor, table, entry['source_id'])
+        cursor.execute(f"DELETE FROM {table} WHERE source_id = ?", (entry['source_id'],))
+        print(f"Removed {cursor.rowcount} rows of {entry['path']} from {table}")
+        return keys
+    # Every key the file wrote is dropped, whichever file won it, and rebuilt by refill_keys
+    key = UPSERT_KEYS[entry['kind']][0]
+    create_upsert_sources_table(cursor)
+    cursor.execute("SELECT token_id FROM upsert_sources WHERE source_id = ? AND table_name = ?", (entry['source_id'], table))
+    keys = {row[0] for row in cursor.fetchall()}
+    cursor.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(token_id,) for token_id in keys])
+    cursor.execute("DELETE FROM upsert_sources WHERE source_id = ? AND table_name = ?", (entry['source_id'], table))
+    refresh_enriched(cursor, entry['kind'], table, keys)
+    print(f"Removed {len(keys)} rows of {entry['path']} from {table}")
+    return keys
+
+def write_rows(cursor, kind, table, df, source_id, batch_size=WRITE_BATCH_SIZE, token_cache=None):
+    """Write one parsed frame; returns rows added (regular) or rows upserted (Top/MCAPS).
+
+    Pass the same token_cache dict for every frame of a run to skip repeat token lookups.
+    """
+    if TOKEN_COLUMNS[kind] in df.columns:
+        df = with_token_ids(cursor, kind, df, {} if token_cache is None else token_cache)
+    df = df.assign(source_id=source_id)
+    if kind == 'regular':
+        written = bulk_insert(cursor, table, df, batch_size=batch_size, ignore=True)
+        sync_enriched(cursor, table)
+        return written
+    key, max_col, follow_cols = UPSERT_KEYS[kind]
+    bulk_upsert(cursor, table, df, key, max_col, follow_cols=follow_cols, batch_size=batch_size)
+    cursor.executemany("INSERT OR IGNORE INTO upsert_sources (source_id, table_name, token_id) VALUES (?, ?, ?)",
+                       [(source_id, table, int(token_id)) for token_id in df[key].tolist()])
+    refresh_enriched(cursor, kind, table, df[key])
+    return len(df)
+
+def refill_keys(cursor, table, kind, keys, sources, token_cache=None, chunksize=STREAM_CHUNK_SIZE):
+    """Re-write freed keys from the remaining source files of a table, oldest source first.
+
+    The files are streamed chunksize rows at a time and only rows with a freed key
+    are kept, so no whole file is held in memory. A freed feed key is taken by the
+    first source that has it, so sources stop being read once every key is refilled.
+    """
+    token_cache = {} if token_cache is None else token_cache
+    keys = set(keys)
+    for entry in sources:
+        path = os.path.join(DATA_DIRECTORY, entry['path'])
+        if not keys:
+            break
+        if not os.path.exists(path):
+            continue
+        for df, _ in stream_file(kind, path, chunksize):
+            if df is None:
+                break
+            df = with_token_ids(cursor, kind, df, token_cache)
+            if kind == 'regular':
+                df = df[pd.MultiIndex.from_frame(df[list(FEED_KEY)]).isin(keys)]
+            else:
+                df = df[df[UPSERT_KEYS[kind][0]].isin(keys)]
+            if df.empty:
+                continue
+            write_rows(cursor, kind, table, df, entry['source_id'])
+            if kind == 'regular':
+                keys -= set(df[list(FEED_KEY)].itertuples(index=False, name=None))
+                if not keys:
+                    break
+
+def spool_frames(frames, spool_path):
+    """Write parsed feed frames to a SQLite file of their own as they come; returns rows spooled.
+
+    Parsing into a spool needs neither data.db's lock nor every row in memory;
+    ingest_export then copies spooled_frames in one short transaction.
+    """
+    spool = sqlite3.connect(spool_path)
+    rows = 0
+    try:
+        for df in frames:
+            df = sqlite_ready(df)
+            if df is not None and not df.empty:
+                df.to_sql('calls', spool, if_exists='append', index=False)
+                rows += len(df)
+        spool.commit()
+    finally:
+        spool.close()
+    return rows
+
+def spooled_frames(spool_path, chunksize=STREAM_CHUNK_SIZE):
+    """Yield the frames spool_frames wrote, chunksize rows at a time and in parse order."""
+    spool = sqlite3.connect(spool_path)
+    try:
+        if spool.execute("SELECT 1 FROM sqlite_master WHERE name = 'calls'").fetchone():
+            yield from pd.read_sql_query("SELECT * FROM calls ORDER BY rowid", spool, chunksize=chunksize)
+    finally:
+        spool.close()
+
+def ingest_export(db_path, frames, export_path):
+    """Append normalised regular feed frames parsed straight from a Discord export.
+
+    frames may be a generator. It is only consumed once the export is known to be
+    new, one frame at a time under the write lock, so it should read already parsed
+    rows (spooled_frames) rather than parse the export itself. The export is recorded
+    in the manifest with origin 'export' (so CSV scans never roll it back) and
+    re-ingesting the same file is a no-op. Returns rows written.
+    """
+    filename = os.path.basename(export_path)
+    kind, table = classify_csv(os.path.splitext(filename)[0] + '.csv')
+    content_hash = file_hash(export_path)
+    stat = os.stat(export_path)
+    conn = sqlite3.connect(db_path, timeout=30)
+    cursor = conn.cursor()
+    parsed = rows = 0
+    token_cache = {}
+    try:
+        create_manifest_table(cursor)
+        cursor.execute("SELECT path FROM ingest_manifest WHERE content_hash = ?", (content_hash,))
+        existing = cursor.fetchone()
+        if existing:
+            print(f"Skipping {filename}: already ingested as {existing[0]}")
+            return 0
+        try:
+            source_id = add_manifest_entry(cursor, content_hash, filename, stat.st_size, stat.st_mtime,
+                                           kind, table, origin='export')
+        except sqlite3.IntegrityError:
+            # Another writer recorded the same export while this one was parsing
+            conn.rollback()
+            print(f"Skipping {filename}: already ingested")
+            return 0
+        create_table(cursor, kind, table)
+        for df in frames:
+            df = sqlite_ready(df)
+            rows += write_rows(cursor, kind, table, df, source_id, token_cache=token_cache)
+            parsed += len(df)
+        if parsed > rows:
+            print(f"Skipped {parsed - rows} calls already in {table}")
+        cursor.execute("UPDATE ingest_manifest SET row_count = ? WHERE source_id = ?", (parsed, source_id))
+        create_indexes(cursor, table)
+        create_feed_view(cursor, table)
+        refresh_catalog(cursor, {table})
+        conn.commit()
+        # Decided in a transaction of its own, so the rows are visible to readers first
+        sync_all_signals(conn, feeds=[table])
+        conn.commit()
+    finally:
+        conn.close()
+    return rows
+
+def init_database(force_rebuild=False, jobs=1, chunksize=None, bulk=False):
     db_path = os.path.join(DATA_DIRECTORY, 'data.db')
     processed_file = os.path.join(DATA_DIRECTORY, 'processed_files.json')
     
-    # Load or reset processed files tracking
-    processed_files = {}
-    if os.path.exists(processed_file) and not force_rebuild:
-        with open(processed_file, 'r') as f:
-            processed_files = json.load(f)
     if force_rebuild and os.path.exists(db_path):
         os.remove(db_path)
     
-    conn = sqlite3.connect(db_path)
+    # Waits out an export being written by AutoExtractor rather than failing at once
+    conn = sqlite3.connect(db_path, timeout=30)
     cursor = conn.cursor()
+    if bulk:
+        prior = begin_bulk_load(conn)
+    create_manifest_table(cursor)
+    
+    migrated = migrate_legacy_tables(cursor)
+    if migrated:
+        print(f"Token id migration: removed {sum(migrated.values())} duplicate rows across {len(migrated)} feed tables")
+        for table, count in sorted(migrated.items()):
+            print(f"  {table}: {count} duplicates removed")
+    backfilled = migrate_funding_hours(cursor)
+    if backfilled:
+        print(f"FundingHours backfilled for {', '.join(backfilled)}")
+    create_upsert_sources_table(cursor)
+    
+    manifest = load_manifest(cursor)
+    if not manifest and os.path.exists(processed_file) and not force_rebuild:
+        seed_manifest(cursor, processed_file)
+        manifest = load_manifest(cursor)
     
     # Get all CSV files
     all_files = [f for f in os.listdir(DATA_DIRECTORY) if f.lower().endswith('.csv')]
     print(f"Found {len(all_files)} CSV files in {DATA_DIRECTORY}: {', '.join(all_files[:5])}...")
     
-    # Classify files (ensure mutual exclusivity)
-    top_csv_files = [f for f in all_files if '10' in f.split('-')[0].lower() and not f.lower().startswith('mcaps-')]
-    mcaps_files = [f for f in all_files if f.lower().startswith('mcaps-')]
-    regular_csv_files = [f for f in all_files if f not in top_csv_files and f not in mcaps_files]
-    
-    print(f"Detected {len(top_csv_files)} Top CSVs: {', '.join(top_csv_files[:5])}..." if top_csv_files else "No Top CSVs detected.")
-    
-    # Filter new/modified files
-    def get_new_files(file_list):
-        new_files = []
-        for f in file_list:
-            full_path = os.path.join(DATA_DIRECTORY, f)
-            mtime = os.path.getmtime(full_path)
-            if full_path not in processed_files or processed_files[full_path] < mtime or force_rebuild:
-                new_files.append(full_path)
-                processed_files[full_path] = mtime
-        return new_files
-    
-    new_regular_csvs = get_new_files(regular_csv_files)
-    new_top_csvs = get_new_files(top_csv_files)
-    new_mcaps = get_new_files(mcaps_files)
-    
-    if not any([new_regular_csvs, new_top_csvs, new_mcaps]):
+    unchanged, to_ingest, touched, duplicates, removed = scan_data_directory(manifest, all_files)
+    for entry, filename, stat in touched:
+        cursor.execute("UPDATE ingest_manifest SET path = ?, size = ?, mtime = ? WHERE source_id = ?",
+                       (filename, stat.st_size, stat.st_mtime, entry['source_id']))
+    for filename, original in duplicates:
+        print(f"Skipping {filename}: same content as {original}")
+    print(f"Manifest: {len(unchanged) + len(touched)} unchanged, {len(to_ingest)} new or modified, {len(removed)} removed")
+    
+    # Back out rows of removed and modified files first
+    freed_keys = {}
+    for entry in removed:
+        keys = rollback_source(cursor, entry)
+        if keys:
+            freed_keys.setdefault((entry['kind'], entry['table_name']), set()).update(keys)
+        cursor.execute("DELETE FROM ingest_manifest WHERE source_id = ?", (entry['source_id'],))
+    
+    if not to_ingest:
         print("No new or modified CSVs to process.")
     else:
-        print(f"Processing {len(new_regular_csvs)} regular CSVs, {len(new_top_csvs)} Top CSVs, {len(new_mcaps)} MCAPS files...")
-        
-        # Regular CSVs (append)
-        for file in new_regular_csvs:
-            base_name = os.path.basename(file).replace('.csv', '')
-            feed_name = base_name.split('-')[0].lower().replace(' ', '_')
-            df = pd.read_csv(file)
-            
-            if 'Contract' in df.columns:
-                df = df.rename(columns={'Contract': 'token'})
-            elif 'contract' in df.columns:
-                df = df.rename(columns={'contract': 'token'})
-            if 'token' not in df.columns:
-                print(f"Warning: No 'token' or 'contract' column in {file}. Skipping.")
-                continue
-            if 'token_name' in df.columns:
-                df = df.rename(columns={'token_name': 'Name'})
-            df['token'] = df['token'].apply(lambda x: f"{str(x)[:8]}..." if len(str(x)) > 8 else str(x))
-            
-            numeric_cols = ["Mcap", "Liq", "AG", "DevBal", "F", "KYC", "Unq", "SM", "TTC", "Drained"]
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col].replace('[\\$,]', '', regex=True), errors='coerce')
-            
-            percent_cols = ["Liq%", "Bundle", "Dev%", "B-Ratio"]
-            for col in percent_cols:
-                if col in df.columns:
-                    df[col] = df[col].replace({'%': ''}, regex=True).astype(float) / 100
-            
-            if 'Timestamp' in df.columns:
-                df['Date'] = pd.to_datetime(df['Timestamp'], errors='coerce')
-                df = df.drop(columns=['Timestamp'], errors='ignore')
-            
-            string_cols = ["Name", "FundingTime", "FundingSource", "Links", "FreshDeployer", "Desc"]
-            for col in string_cols:
-                if col in df.columns:
-                    df[col] = df[col].astype(str).fillna('')
-            
-            if 'FundingTime' in df.columns and 'FundingSource' in df.columns:
-                df['Funding'] = df['FundingTime'] + ' (' + df['FundingSource'] + ')'
-            
-            expected_cols = ['token', 'Date', 'Name', 'Mcap', 'Liq', 'Liq%', 'AG', 'Bundle', 
-                             'FundingTime', 'FundingSource', 'Funding', 'Dev%', 'DevBal', 'Links', 
-                             'F', 'KYC', 'Unq', 'SM', 'TTC', 'B-Ratio', 'FreshDeployer', 'Drained', 'Desc']
-            for col in expected_cols:
-                if col not in df.columns:
-                    df[col] = 0.0 if col in numeric_cols or col in percent_cols else ''
-            df = df[expected_cols]
-            
-            if force_rebuild and file == new_regular_csvs[0]:
-                cursor.execute(f"DROP TABLE IF EXISTS {feed_name}")
-            cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS {feed_name} (
-                    token TEXT,
-                    Date DATETIME,
-                    Name TEXT,
-                    Mcap REAL,
-                    Liq REAL,
-                    "Liq%" REAL,
-                    AG REAL,
-                    Bundle REAL,
-                    FundingTime TEXT,
-                    FundingSource TEXT,
-                    Funding TEXT,
-                    "Dev%" REAL,
-                    DevBal REAL,
-                    Links TEXT,
-                    F REAL,
-                    KYC REAL,
-                    Unq REAL,
-                    SM REAL,
-                    TTC REAL,
-                    "B-Ratio" REAL,
-                    FreshDeployer TEXT,
-                    Drained REAL,
-                    Desc TEXT
-                )
-            """)
-            df.to_sql(feed_name, conn, if_exists='append', index=False, chunksize=40, method='multi')
-            cursor.execute(f"SELECT COUNT(*) FROM {feed_name}")
-            total_rows = cursor.fetchone()[0]
-            print(f"Added {feed_name} with {len(df)} new rows (total now {total_rows})")
-        
-        # Top CSVs (upsert)
-        for file in new_top_csvs:
-            base_name = os.path.basename(file).replace('.csv', '')
-            feed_name = base_name.split('-')[0].lower().replace(' ', '_')
-            df = pd.read_csv(file)
-            
-            if 'Contract' not in df.columns and 'contract' in df.columns:
-                df = df.rename(columns={'contract': 'Contract'})
-            if 'Contract' not in df.columns:
-                print(f"Warning: No 'Contract' or 'contract' column in {file}. Skipping.")
-                continue
-            if 'token_name' in df.columns:
-                df = df.rename(columns={'token_name': 'Name'})
-            if 'start_mcap' in df.columns and 'end_mcap' in df.columns:
-                df = df.rename(columns={'start_mcap': 'Mcap', 'end_mcap': 'HighestMcap', 'profit_multiples': 'Multiples'})
-            df['Contract'] = df['Contract'].apply(lambda x: f"{str(x)[:8]}..." if len(str(x)) > 8 else str(x))
-            
-            numeric_cols = ['Mcap', 'HighestMcap']
-            for col in numeric_cols:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            if 'Multiples' in df.columns:
-                df['Multiples'] = pd.to_numeric(df['Multiples'].str.replace('x', ''), errors='coerce')
-            if 'Name' in df.columns:
-                df['Name'] = df['Name'].astype(str).fillna('')
-            
-            expected_cols = ['Contract', 'Name', 'Mcap', 'HighestMcap', 'Multiples']
-            for col in expected_cols:
-                if col not in df.columns:
-                    df[col] = 0.0 if col in numeric_cols or col == 'Multiples' else ''
-            df = df[expected_cols]
-            
-            if force_rebuild and file == new_top_csvs[0]:
-                cursor.execute(f"DROP TABLE IF EXISTS {feed_name}")
-            cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS {feed_name} (
-                    Contract TEXT PRIMARY KEY,
-                    Name TEXT,
-                    Mcap REAL,
-                    HighestMcap REAL,
-                    Multiples REAL
-                )
-            """)
-            for _, row in df.iterrows():
-                cursor.execute(f"""
-                    INSERT OR REPLACE INTO {feed_name} (Contract, Name, Mcap, HighestMcap, Multiples)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (row['Contract'], row['Name'], row['Mcap'], row['HighestMcap'], row['Multiples']))
-            cursor.execute(f"SELECT COUNT(*) FROM {feed_name}")
-            total_rows = cursor.fetchone()[0]
-            print(f"Updated {feed_name} with {len(df)} rows processed (total now {total_rows})")
-        
-        # MCAPS (upsert)
-        if new_mcaps:
-            mcaps_df = pd.concat([pd.read_csv(f) for f in new_mcaps], ignore_index=True)
-            if 'token' not in mcaps_df.columns and 'contract' in mcaps_df.columns:
-                mcaps_df = mcaps_df.rename(columns={'contract': 'token'})
-            if 'token' not in mcaps_df.columns:
-                print(f"Warning: No 'token' or 'contract' column in MCAPS files. Skipping.")
-            else:
-                mcaps_df['token'] = mcaps_df['token'].apply(lambda x: f"{str(x)[:8]}..." if len(str(x)) > 8 else str(x))
-                if 'market_cap_usd' in mcaps_df.columns:
-                    mcaps_df['Mcap'] = pd.to_numeric(mcaps_df['market_cap_usd'].replace('[\\$,]', '', regex=True), errors='coerce')
-                if 'max_market_cap_usd' in mcaps_df.columns:
-                    mcaps_df['MaxMcap'] = pd.to_numeric(mcaps_df['max_market_cap_usd'].replace('[\\$,]', '', regex=True), errors='coerce')
-                mcaps_df = mcaps_df[['token', 'Mcap', 'MaxMcap']].dropna(subset=['token'])
-                
-                if force_rebuild:
-                    cursor.execute("DROP TABLE IF EXISTS mcaps")
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS mcaps (
-                        token TEXT PRIMARY KEY,
-                        Mcap REAL,
-                        MaxMcap REAL
-                    )
-                """)
-                for _, row in mcaps_df.iterrows():
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO mcaps (token, Mcap, MaxMcap)
-                        VALUES (?, ?, ?)
-                    """, (row['token'], row['Mcap'], row['MaxMcap']))
-                cursor.execute("SELECT COUNT(*) FROM mcaps")
-                total_rows = cursor.fetchone()[0]
-                print(f"Updated mcaps with {len(mcaps_df)} rows processed (total now {total_rows})")
-    
-    # Save processed files
-    with open(processed_file, 'w') as f:
-        json.dump(processed_files, f)
+        counts = {kind: sum(1 for item in to_ingest if item['kind'] == kind) for kind in LOADERS}
+        print(f"Processing {counts['regular']} regular CSVs, {counts['top']} Top CSVs, {counts['mcaps']} MCAPS files...")
+    
+    # Bulk loads append without index maintenance; every index is rebuilt below
+    batch_size = BULK_BATCH_SIZE if bulk else WRITE_BATCH_SIZE
+    if bulk:
+        for table in {item['table_name'] for item in to_ingest}:
+            drop_indexes(cursor, table)
+    
+    ingested_ids = set()
+    token_cache = {}
+    parse_seconds = write_seconds = 0.0
+    ingested_rows = 0
+    ingest_start = time.perf_counter()
+    if chunksize:
+        # Streaming keeps one chunk in memory at a time, so parsing stays in this process
+        if jobs > 1:
+            print(f"Streaming in {chunksize}-row chunks; --jobs is ignored.")
+            jobs = 1
+        files = ((item, stream_file(item['kind'], os.path.join(DATA_DIRECTORY, item['path']), chunksize))
+                 for item in to_ingest)
+    else:
+        files = ((item, [(df, seconds)]) for item, df, seconds in parse_files(to_ingest, jobs))
+    for item, frames in files:
+        kind, table = item['kind'], item['table_name']
+        source_id = add_manifest_entry(cursor, item['content_hash'], item['path'], item['size'], item['mtime'], kind, table)
+        ingested_ids.add(source_id)
+        file_rows = file_written = 0
+        peak_rss = current_rss()
+        for df, seconds in frames:
+            parse_seconds += seconds
+            # Unusable files keep row_count 0 so they are not re-read until they change
+            if df is None:
+                break
+            write_start = time.perf_counter()
+            create_table(cursor, kind, table)
+            file_written += write_rows(cursor, kind, table, df, source_id, batch_size=batch_size, token_cache=token_cache)
+            write_seconds += time.perf_counter() - write_start
+            file_rows += len(df)
+            rss = current_rss()
+            peak_rss = max(peak_rss, rss) if rss is not None else None
+        if not file_rows:
+            continue
+        cursor.execute("UPDATE ingest_manifest SET row_count = ? WHERE source_id = ?", (file_rows, source_id))
+        ingested_rows += file_rows
+        cursor.execute(f"SELECT COUNT(*) FROM {table}")
+        total_rows = cursor.fetchone()[0]
+        if kind == 'regular':
+            print(f"Added {table} with {file_written} new rows from {item['path']} "
+                  f"({file_rows - file_written} duplicates skipped, total now {total_rows}, peak RSS {format_rss(peak_rss)})")
+        else:
+            print(f"Updated {table} with {file_rows} rows processed from {item['path']} (total now {total_rows}, peak RSS {format_rss(peak_rss)})")
+    if to_ingest:
+        wall_seconds = time.perf_counter() - ingest_start
+        print(f"Parse: {ingested_rows} rows in {parse_seconds:.2f}s worker time across {max(jobs, 1)} job(s) "
+              f"({ingested_rows / max(parse_seconds, 1e-9):,.0f} rows/sec per job)")
+        print(f"Write: {ingested_rows} rows in {write_seconds:.2f}s ({ingested_rows / max(write_seconds, 1e-9):,.0f} rows/sec)")
+        print(f"Ingest: {ingested_rows} rows in {wall_seconds:.2f}s wall ({ingested_rows / max(wall_seconds, 1e-9):,.0f} rows/sec)")
+    
+    # Keys a backed-out file wrote fall back to the other files. Top/MCAPS keys are
+    # replayed through every remaining file in ingest order, the ones just ingested
+    # included, as later files overwrite the columns other than the max column
+    for (kind, table), keys in freed_keys.items():
+        sources = [entry for entry in load_manifest(cursor)
+                   if entry['table_name'] == table and (kind != 'regular' or entry['source_id'] not in ingested_ids)]
+        refill_keys(cursor, table, kind, keys, sources, token_cache=token_cache, chunksize=chunksize or STREAM_CHUNK_SIZE)
     
     # Add indexes
+    index_start = time.perf_counter()
     for table in pd.read_sql_query("SELECT name FROM sqlite_master WHERE type='table'", conn)['name']:
-        if table != 'mcaps':
-            cursor.execute(f"PRAGMA table_info({table})")
-            columns = [col[1] for col in cursor.fetchall()]
-            if 'token' in columns:
-                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_token ON {table} (token)")
-            elif 'Contract' in columns:
-                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_contract ON {table} (Contract)")
-            if 'Date' in columns:
-                cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_date ON {table} (Date)")
+        if table not in ('ingest_manifest', 'upsert_sources'):
+            create_indexes(cursor, table)
+    create_feed_views(cursor)
+    # Recount only what this run touched; the CLI reads counts from the catalog
+    changed = set(migrated) | set(backfilled) | {item['table_name'] for item in to_ingest} | {entry['table_name'] for entry in removed}
+    refresh_catalog(cursor, changed)
+    if bulk:
+        print(f"Rebuilt indexes in {time.perf_counter() - index_start:.2f}s")
+    # Wallets are decided on the new rows only (every row for new or edited wallets)
+    for feed, (new, redone, seconds) in sync_all_signals(conn).items():
+        if new or redone:
+            print(f"Wallet signals for {feed}: {new} new and {redone} re-enriched row decisions in {seconds:.2f}s")
     
     conn.commit()
+    if bulk:
+        end_bulk_load(conn, prior)
     conn.close()
     print("Database updated with new CSVs and indexes.")
 
 if __name__ == "__main__":
-    import sys
-    force = "--force" in sys.argv
-    init_database(force_rebuild=force)
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="Build or update data.db from the CSVs in the data directory.")
+    parser.add_argument('--force', action='store_true', help="Delete data.db and rebuild it from scratch")
+    parser.add_argument('--jobs', type=int, default=1, help="Worker processes for CSV parsing (default 1)")
+    parser.add_argument('--stream', action='store_true', help="Read, normalise and insert each CSV in fixed-size chunks")
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNK_SIZE, help=f"Rows per chunk with --stream (default {STREAM_CHUNK_SIZE})")
+    parser.add_argument('--bulk', action='store_true', help="Backfill mode: WAL, no fsync, large batches, indexes rebuilt after the load, then ANALYZE and the prior journal mode restored")
+    args = parser.parse_args()
+    init_database(force_rebuild=args.force, jobs=args.jobs, chunksize=args.chunksize if args.stream else None, bulk=args.bulk)
\ No newline at end of file
@@ -2,19 +2,22 @@ import pandas as pd
 import sqlite3
 from table_display import display_table, search_tables_by_contract
 from wallet_utils import format_wallet_table, update_criteria
-from wallet_config import load_wallets, save_wallets, duplicate_wallet_config
+from wallet_config import load_wallets, save_wallets, duplicate_wallet_config, wallet_history
+from table_format import format_table_columns
 from config import DATA_DIRECTORY
+from data_loader import Catalog, FrameCache
 from ui_utils import menu_selection, get_terminal_height
 import platform
 import os
+import logging
 import colorama
 from colorama import Fore, Style
 
 colorama.init()
 
-def manage_wallets(conn):
+def manage_wallets(conn, catalog):
     wallets = load_wallets()
-    options = ["Create New Wallet", "Edit Wallet", "Duplicate Wallet", "Delete Wallet", "Back"] if wallets else ["Create New Wallet", "Back"]
+    options = ["Create New Wallet", "Edit Wallet", "Duplicate Wallet", "Delete Wallet", "Wallet History", "Back"] if wallets else ["Create New Wallet", "Back"]
     
     while True:
         wallet_table = format_wallet_table(wallets) if wallets else "No wallets configured."
@@ -60,6 +63,13 @@ def manage_wallets(conn):
                 if confirm == "Yes":
                     del wallets[del_choice]
                     save_wallets(wallets)
+        
+        elif choice == "Wallet History" and wallets:
+            # Counted in SQLite over every feed's whole history; no feed is loaded
+            history = wallet_history(conn, wallets, catalog)
+            for col in ["Avg X's", "Max X's"]:
+                history[col] = [f"{x:.2f}x" if pd.notna(x) else "-" for x in history[col]]
+            menu_selection(["Back"], format_table_columns(history, {}), prompt="=== WALLET HISTORY ===")
 
 def main():
     if platform.system() == "Windows":
@@ -73,20 +83,15 @@ def main():
         return
     conn = sqlite3.connect(db_path)
     
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'mcaps'")
-    feed_tables = [row[0] for row in cursor.fetchall()]
-    if not feed_tables:
+    # One catalog and frame cache for the session; both reload only after an ingest commits
+    catalog = Catalog(conn)
+    frames = FrameCache(conn)
+    if not catalog.tables():
         print("Error: No feed tables found in database. Run init_db.py with data.")
         conn.close()
         return
     
-    regular_feeds = [t for t in feed_tables if not t.endswith('10')]
-    top_feeds = [t for t in feed_tables if t.endswith('10')]
-    
     main_menu = ["Feeds", "Wallets", "Search by contract", "Exit"]
-    feed_options = [table.replace('_', ' ').title() for table in regular_feeds] + \
-                   [table.replace('_', ' ').title().replace('10', ' Top') for table in top_feeds] + ["Back"]
     
     while True:
         choice = menu_selection(main_menu, "", prompt="=== MAIN MENU ===")
@@ -94,23 +99,29 @@ def main():
             break
         
         if choice == "Feeds":
+            feed_tables = catalog.tables()
+            regular_feeds = [t for t in feed_tables if not t.endswith('10')]
+            top_feeds = [t for t in feed_tables if t.endswith('10')]
+            feed_options = [table.replace('_', ' ').title() for table in regular_feeds] + \
+                           [table.replace('_', ' ').title().replace('10', ' Top') for table in top_feeds] + ["Back"]
             feed_choice = menu_selection(feed_options, "", prompt="=== FEEDS ===")
             if feed_choice != "Back" and feed_choice is not None:
                 internal_key = feed_choice.lower().replace(' ', '_').replace('top', '10')
                 display_name = feed_choice
-                display_table(internal_key, conn, display_name)
+                display_table(internal_key, conn, display_name, catalog=catalog, frames=frames)
         
         elif choice == "Wallets":
-            manage_wallets(conn)
+            manage_wallets(conn, catalog)
         
         elif choice == "Search by contract":
-            search_tables_by_contract(conn)
+            search_tables_by_contract(conn, catalog, frames)
         
         if platform.system() == "Windows":
             os.system('cls')
         else:
             os.system('clear')
     
+    logging.debug(frames.summary())
     conn.close()
 
 if __name__ == "__main__":
@@ -1,13 +1,15 @@
 import pandas as pd
-from table_format import format_table_columns
-from table_utils import filter_table, generate_wallet_summary, search_contracts_in_pf, generate_wallet_config_from_rows
+from table_format import TableRenderer
+from table_utils import filter_table, prompt_filters, compile_filters, apply_filters, generate_wallet_summary, search_contracts_in_pf, generate_wallet_config_from_rows
 from ui_utils import menu_selection, print_filters, get_terminal_height
-from wallet_config import load_wallets, apply_wallet_config, create_wallet_config, DEFAULT_CRITERIA
-from data_loader import load_mcaps_db
+from wallet_config import load_wallets, wallet_matrix, wallet_columns, create_wallet_config, DEFAULT_CRITERIA
+from wallet_signals import signal_matrix
+from data_loader import Catalog, FeedPager, FrameCache
 from config import DATA_DIRECTORY
 import platform
 from datetime import datetime
 import os
+import sqlite3
 if platform.system() == "Windows":
     import msvcrt
 else:
@@ -17,81 +19,82 @@ from colorama import Fore, Style
 
 colorama.init()
 
-def display_table(table_name, conn, display_name, search_results=None):
+def feed_frame(pager, frames):
+    """Every row behind pager, from the session's frame cache while data.db is unchanged."""
+    return frames.get(('feed', pager.view, pager.where, pager.params), pager.frame)
+
+def feed_view(catalog, feed):
+    """The catalogued view of feed, or None with a hint; the CLI reads data.db and never builds views itself."""
+    view = (catalog.entry(feed) or {}).get('view_name')
+    if not view:
+        print(f"No view catalogued for {feed}: run init_db.py to build it.")
+    return view
+
+def display_table(table_name, conn, display_name, search_results=None, catalog=None, frames=None):
     if conn is None:
         print("Error: Database connection failed.")
         return
+    catalog = catalog or Catalog(conn)
+    frames = frames or FrameCache(conn)
     
-    mcaps_df = load_mcaps_db(conn)
     is_top_table = table_name.endswith('10')
     base_name = table_name.replace('10', '')
+    pager = feed_pager = None
     
     if search_results is not None and not search_results.empty:
         df = search_results.copy()
+        total_rows = len(df)
     else:
         if is_top_table:
-            columns = 'Contract, Name, Mcap, HighestMcap, Multiples'
-            query = f"SELECT {columns} FROM {table_name} ORDER BY Multiples DESC"
+            columns = 'tokens.address AS Contract, token_id, Name, Mcap, HighestMcap, Multiples'
+            query = f"SELECT {columns} FROM {table_name} LEFT JOIN tokens USING (token_id) ORDER BY Multiples DESC"
             try:
-                df = pd.read_sql_query(query, conn)
+                df = frames.get(('top', table_name), lambda: pd.read_sql_query(query, conn))
             except pd.io.sql.DatabaseError as e:
                 print(f"Database error: {e}")
                 return
         else:
-            columns = 'token, Date, Name, Mcap, Liq, "Liq%", AG, Bundle, FundingTime, FundingSource, Funding, "Dev%", DevBal, Links, F, KYC, Unq, SM, TTC, "B-Ratio", FreshDeployer, Drained, Desc'
-            query = f"SELECT {columns} FROM {base_name}"  # No LIMIT to fetch all rows
+            # Feeds are paged straight from SQLite (MaxMcap and X's come precomputed from
+            # <feed>_enriched); the whole feed is only loaded once an action needs every row.
+            # The catalog knows the view and row count, so opening a feed counts nothing
+            entry = catalog.entry(base_name) or {}
+            view = feed_view(catalog, base_name)
+            if not view:
+                return
             try:
-                df = pd.read_sql_query(query, conn)
-            except pd.io.sql.DatabaseError as e:
+                pager = feed_pager = FeedPager(conn, view, base_name, count=entry.get('row_count'))
+            except sqlite3.DatabaseError as e:
                 print(f"Database error: {e}")
                 return
-            
-            if 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            
-            # Merge with Top table data if exists
-            top_table = f"{base_name}10"
-            if top_table in pd.read_sql_query("SELECT name FROM sqlite_master WHERE type='table'", conn)['name'].values:
-                top_df = pd.read_sql_query(f"SELECT Contract AS token, HighestMcap AS MaxMcap FROM {top_table}", conn)
-                df = df.merge(top_df, on='token', how='left', suffixes=('', '_top'))
-                if 'MaxMcap_top' in df.columns:
-                    df['MaxMcap'] = df['MaxMcap_top'].fillna(df.get('MaxMcap', df['Mcap']))
-                    df = df.drop(columns=['MaxMcap_top'], errors='ignore')
-            
-            # Merge with MCAPS data, prioritizing Top table MaxMcap
-            if not mcaps_df.empty:
-                df = df.merge(mcaps_df, on='token', how='left', suffixes=('', '_mcaps'))
-                if 'MaxMcap_mcaps' in df.columns:
-                    df['MaxMcap'] = df['MaxMcap'].fillna(df['MaxMcap_mcaps']).fillna(df['Mcap'])
-                    df = df.drop(columns=['MaxMcap_mcaps'], errors='ignore')
-            
-            df["X's"] = (df['MaxMcap'] / df['Mcap']).replace([float('inf'), -float('inf')], 0).fillna(0)
-            df = df.sort_values('Date', ascending=False)
+            df = None
+        total_rows = pager.count if pager else len(df)
     
-    total_rows = pd.read_sql_query(f"SELECT COUNT(*) as count FROM {table_name}", conn).iloc[0]['count']
-    if '#' not in df.columns:
+    if df is not None and '#' not in df.columns:
         df.insert(0, "#", range(1, len(df) + 1))
-    original_df = df.copy()
+    original_df = df.copy() if pager is None else None
     filters = {}
     applied_configs = {}
+    wallet_buys = {}  # buy count of each applied config, for the summary
     page = 0
+    renderer = TableRenderer()
     
     while True:
         options = ["Return to menu", "Search in PF", "Filter Table", "Clear Filters", "Export to CSV", "Wallet Configs", "Next Page", "Prev Page", "Back"]
-        middle_content = generate_wallet_summary(df, applied_configs.keys())
-        if not middle_content:
-            middle_content = ""
+        middle_content = generate_wallet_summary(wallet_buys, len(df)) if df is not None else ""
         
         terminal_height = get_terminal_height()
         menu_lines = len(options) + 2
         middle_lines = middle_content.count('\n') + 1 if middle_content else 0
         header_lines = 4  # Filters, Rows, Title, Table header
         rows_per_page = max(1, terminal_height - menu_lines - middle_lines - header_lines)
+        row_count = len(df) if df is not None else pager.count
         start_idx = page * rows_per_page
-        end_idx = min((page + 1) * rows_per_page, len(df))
-        visible_df = df.iloc[start_idx:end_idx]
-        table_str_full = f"{print_filters(filters)}\nRows: {len(df)} of {total_rows}\n=== Data for {display_name.upper()} ===\n" + \
-                        format_table_columns(visible_df, applied_configs)
+        end_idx = min((page + 1) * rows_per_page, row_count)
+        # Menu actions that leave the table alone redraw the page from the renderer's cache
+        source = df if df is not None else pager
+        page_rows = (lambda start, stop: df.iloc[start:stop]) if df is not None else pager.rows
+        table_str_full = f"{print_filters(filters)}\nRows: {row_count} of {total_rows}\n=== Data for {display_name.upper()} ===\n" + \
+                        renderer.render(source, start_idx, end_idx, applied_configs, page_rows)
         
         table_lines = table_str_full.split('\n')
         table_str = '\n'.join(table_lines[:terminal_height - menu_lines - middle_lines])
@@ -99,35 +102,50 @@ def display_table(table_name, conn, display_name, search_results=None):
         choice = menu_selection(options, table_str, middle_content, prompt=f"=== {display_name.upper()} ===")
         if choice in ["Back", "Return to menu"] or choice is None:
             break
+        if df is None and choice in ["Search in PF", "Export to CSV", "Wallet Configs"]:
+            df = feed_frame(pager, frames)
         
         if choice == "Search in PF" and not is_top_table:
             selected = menu_selection(options, table_str, middle_content, prompt="Enter selection numbers (comma-separated, or 'all'): ", allow_input=True)
             if selected is None:
                 continue
             if selected.lower() == "all":
-                contracts = df["token"].tolist()
+                contracts = df["token_id"].tolist()
                 search_contracts_in_pf(contracts, conn, df)
             else:
                 selected_nums = [int(i.strip()) for i in selected.split(',') if i.strip().isdigit()]
                 if selected_nums and all(num in df["#"].values for num in selected_nums):
                     filtered_df = df.loc[df["#"].isin(selected_nums)]
-                    contracts = filtered_df["token"].tolist()
+                    contracts = filtered_df["token_id"].tolist()
                     search_contracts_in_pf(contracts, conn, filtered_df)
                 else:
                     menu_selection(options, table_str, middle_content, info_message="Invalid selection. Press any key to continue...")
                     input()
         
         elif choice == "Filter Table":
-            df, filters = filter_table(df, display_name, filters)
-            df = df.drop(columns=list(applied_configs.keys()), errors='ignore')
+            if pager is not None and not applied_configs:
+                # Paged feeds filter in SQL; only filters on columns the view lacks need rows in memory
+                filters = prompt_filters(pager.columns, display_name, filters)
+                where, params, leftover = compile_filters(filters, pager.columns)
+                pager = feed_pager.filtered(where, params)
+                df = apply_filters(feed_frame(pager, frames), leftover) if leftover else None
+            else:
+                df, filters = filter_table(df, display_name, filters)
+            if df is not None:
+                df = df.drop(columns=list(applied_configs.keys()), errors='ignore')
             applied_configs = {}
+            wallet_buys = {}
             page = 0
         
         elif choice == "Clear Filters":
-            df = original_df.copy()
-            df = df.drop(columns=list(applied_configs.keys()), errors='ignore')
+            # A paged feed drops its loaded frame and goes back to reading pages
+            df = original_df.copy() if pager is None else None
+            pager = feed_pager
+            if df is not None:
+                df = df.drop(columns=list(applied_configs.keys()), errors='ignore')
             filters = {}
             applied_configs = {}
+            wallet_buys = {}
             page = 0
         
         elif choice == "Export to CSV":
@@ -135,7 +153,9 @@ def display_table(table_name, conn, display_name, search_results=None):
             export_dir = "exports"
             os.makedirs(export_dir, exist_ok=True)
             filename = os.path.join(export_dir, f"table_export_{timestamp}.csv")
-            df.to_csv(filename, index=False)
+            # Feed frames hold float32 columns; the file gets the values as stored
+            export_df = pager.stored_floats(df) if pager is not None else df
+            export_df.drop(columns=['token_id', 'feed_rowid'], errors='ignore').to_csv(filename, index=False)
             menu_selection(options, table_str, middle_content, info_message=f"Table exported to {filename}. Press any key to continue...")
             input()
         
@@ -165,10 +185,20 @@ def display_table(table_name, conn, display_name, search_results=None):
                         except ValueError:
                             selected_configs = []
                     if selected_configs:
-                        for config_name in selected_configs:
-                            if config_name not in df.columns:
-                                df[config_name] = apply_wallet_config(df, config_name, wallets[config_name])
-                                applied_configs[config_name] = wallets[config_name]
+                        # Every selected config is evaluated in one pass and added as one-byte columns
+                        new_configs = {name: wallets[name] for name in selected_configs if name not in df.columns}
+                        matrix = None
+                        if feed_pager is not None and 'feed_rowid' in df.columns:
+                            # Feed rows are decided once and stored; applying reads each wallet's buys off wallet_signals
+                            try:
+                                matrix = signal_matrix(conn, base_name, wallets, list(new_configs), df['feed_rowid'])
+                            except sqlite3.DatabaseError:
+                                pass  # data.db is locked by an ingest; decide in memory this time
+                        if matrix is None:
+                            matrix = wallet_matrix(df, new_configs.values())
+                        df = pd.concat([df, wallet_columns(matrix, new_configs, df.index)], axis=1)
+                        applied_configs.update(new_configs)
+                        wallet_buys.update(zip(new_configs, matrix.sum(axis=0).tolist()))
                         page = 0
                     else:
                         menu_selection(wallet_options, table_str, middle_content, info_message="No valid configs selected. Press any key to continue...")
@@ -209,45 +239,51 @@ def display_table(table_name, conn, display_name, search_results=None):
                     if remove_choice == "Remove All":
                         df = df.drop(columns=list(applied_configs.keys()))
                         applied_configs.clear()
+                        wallet_buys.clear()
                     else:
                         selected_num = int(remove_choice.split(':')[0]) - 1
                         config_name = list(applied_configs.keys())[selected_num]
                         df = df.drop(columns=[config_name])
                         del applied_configs[config_name]
+                        del wallet_buys[config_name]
                     page = 0
         
         elif choice == "Next Page":
-            if (page + 1) * rows_per_page < len(df):
+            if (page + 1) * rows_per_page < row_count:
                 page += 1
         elif choice == "Prev Page":
             if page > 0:
                 page -= 1
 
-def search_tables_by_contract(conn):
+def search_tables_by_contract(conn, catalog=None, frames=None):
     contract = menu_selection([], "", prompt="Enter contract address to search: ", allow_input=True)
     if not contract:
         return
     
-    cursor = conn.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'mcaps'")
-    feed_tables = [row[0] for row in cursor.fetchall()]
+    catalog = catalog or Catalog(conn)
+    feed_tables = catalog.tables()
     
     results = []
+    # Match the full addresses once in the tokens dictionary; the feeds are then probed by integer id
+    matching_ids = "token_id IN (SELECT token_id FROM tokens WHERE address LIKE ?)"
     for table in feed_tables:
         if table.endswith('10'):
-            query = f"SELECT Contract AS token, Name, Mcap, HighestMcap AS MaxMcap, Multiples AS \"X's\" FROM {table} WHERE Contract LIKE ?"
+            query = f"SELECT tokens.address AS token, token_id, Name, Mcap, HighestMcap AS MaxMcap, Multiples AS \"X's\" FROM {table} JOIN tokens USING (token_id) WHERE {matching_ids}"
         else:
-            query = f"SELECT * FROM {table} WHERE token LIKE ?"
+            view = feed_view(catalog, table)
+            if not view:
+                continue
+            query = f"SELECT * FROM {view} WHERE {matching_ids}"
         df = pd.read_sql_query(query, conn, params=(f"%{contract}%",))
         if not df.empty:
             df['Feed'] = table.replace('_', ' ').title().replace('10', ' Top')
             if not table.endswith('10') and 'Date' in df.columns:
-                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+                df['Date'] = pd.to_datetime(df['Date'], format='ISO8601', errors='coerce')
             results.append(df)
     
     if results:
         combined_df = pd.concat(results, ignore_index=True)
-        display_table('search_results', conn, f"Search Results for '{contract}'", search_results=combined_df)
+        display_table('search_results', conn, f"Search Results for '{contract}'", search_results=combined_df, catalog=catalog, frames=frames)
     else:
         print(f"No results found for contract '{contract}'. Press any key to continue...")
         input()
\ No newline at end of file
@@ -1,42 +1,95 @@
 import pandas as pd
+import numpy as np
 import colorama
+from collections import OrderedDict
 from colorama import Fore, Style
 
+RENDER_CACHE_PAGES = 16
+# token_id and feed_rowid are keys and the address is shown through the token/Contract column;
+# FundingHours repeats FundingTime as a number for filters and wallets
+HIDDEN_COLUMNS = ['token_id', 'feed_rowid', 'FundingHours']
+MONEY_COLUMNS = ["Mcap", "Liq", "MaxMcap", "DevBal"]
+PERCENT_COLUMNS = ["Bundle", "Dev%"]
+WALLET_COLORS = {"buy": Fore.GREEN, "skip": Fore.RED}
+
+def format_dates(series):
+    """'%d/%m/%y %H:%M' for a datetime column, from numpy's ISO strings rather than a strftime per cell."""
+    if series.dt.tz is not None:
+        series = series.dt.tz_localize(None)  # keeps the wall time of the stored zone
+    iso = np.datetime_as_string(series.to_numpy(dtype='datetime64[m]'), unit='m')
+    return [f"{x[8:10]}/{x[5:7]}/{x[2:4]} {x[11:16]}" if x != 'NaT' else "NaN" for x in iso.tolist()]
+
+def format_column(col, series):
+    """Display strings for one whole column; missing values show as NaN."""
+    if col in ["token", "Contract"]:
+        return [f"{x[:8]}..." if len(x) > 8 else x for x in map(str, series.tolist())]
+    if col == "Date" and pd.api.types.is_datetime64_any_dtype(series):
+        return format_dates(series)
+    missing = series.isna().to_numpy().tolist()
+    values = series.tolist()
+    if col == "Links":
+        return ["No" if m or not x else "Yes" for x, m in zip(values, missing)]
+    if col == "Date":
+        return [x.strftime('%d/%m/%y %H:%M') if isinstance(x, pd.Timestamp) and not m else "NaN" for x, m in zip(values, missing)]
+    if col in PERCENT_COLUMNS + MONEY_COLUMNS + ["X's"]:
+        if not pd.api.types.is_float_dtype(series):
+            values = pd.to_numeric(series, errors='coerce').astype(float).tolist()
+        spec = "{:.2f}x" if col == "X's" else "${:,.0f}" if col in MONEY_COLUMNS else None
+        if spec is None:
+            return ["NaN" if m else f"{x * 100:.2f}%" for x, m in zip(values, missing)]
+        return ["NaN" if m else spec.format(x) for x, m in zip(values, missing)]
+    if series.dtype == np.float32:
+        # A float32 widened by tolist() shows its rounding error; numpy prints the shortest float32 repr
+        values = series.to_numpy()
+    return ["NaN" if m else str(x) for x, m in zip(values, missing)]
+
 def format_table_columns(df, applied_configs):
     if df.empty:
         return "No data available."
-    
-    df = df.copy()
-    col_widths = {}
+
+    df = df.drop(columns=HIDDEN_COLUMNS, errors='ignore')
+    columns = []
     for col in df.columns:
-        if col == "token":
-            df[col] = df[col].apply(lambda x: f"{str(x)[:8]}..." if pd.notna(x) and len(str(x)) > 8 else str(x))
-        elif col == "Links":
-            df[col] = df[col].apply(lambda x: "Yes" if pd.notna(x) and x else "No")
-        elif col in ["Bundle", "Dev%"]:
-            df[col] = df[col].apply(lambda x: f"{x*100:.2f}%" if pd.notna(x) else "NaN")
-        elif col == "Date":
-            df[col] = df[col].apply(lambda x: x.strftime('%d/%m/%y %H:%M') if pd.notna(x) and isinstance(x, pd.Timestamp) else "NaN")
-        elif col == "X's":
-            df[col] = df[col].apply(lambda x: f"{x:.2f}x" if pd.notna(x) else "NaN")
-        elif col in ["Mcap", "Liq", "MaxMcap", "DevBal"]:
-            df[col] = df[col].apply(lambda x: f"${x:,.0f}" if pd.notna(x) else "NaN")
-        else:
-            df[col] = df[col].apply(lambda x: str(x) if pd.notna(x) else "NaN")
-        col_widths[col] = max(len(str(col)), df[col].str.len().max())
-    
-    header = " | ".join(f"{Fore.CYAN}{col:<{col_widths[col]}}{Style.RESET_ALL}" for col in df.columns)
-    separator = " | ".join("-" * col_widths[col] for col in df.columns)
-    rows = []
-    for _, row in df.iterrows():
-        formatted_row = []
-        for col in df.columns:
-            value = str(row[col])
-            if col in applied_configs:
-                color = Fore.GREEN if value == "buy" else Fore.RED if value == "skip" else Fore.WHITE
-                formatted_row.append(f"{color}{value:<{col_widths[col]}}{Style.RESET_ALL}")
-            else:
-                formatted_row.append(f"{value:<{col_widths[col]}}")
-        rows.append(" | ".join(formatted_row))
-    
-    return "\n".join([header, separator] + rows)
\ No newline at end of file
+        text = format_column(col, df[col])
+        width = max(len(str(col)), max(map(len, text)))
+        cells = [x.ljust(width) for x in text]
+        if col in applied_configs:
+            # Wallet columns are colored by value in one pass over the column
+            cells = [f"{WALLET_COLORS.get(x, Fore.WHITE)}{cell}{Style.RESET_ALL}" for x, cell in zip(text, cells)]
+        columns.append((col, width, cells))
+
+    header = " | ".join(f"{Fore.CYAN}{col:<{width}}{Style.RESET_ALL}" for col, width, _ in columns)
+    separator = " | ".join("-" * width for _, width, _ in columns)
+    rows = [" | ".join(cells) for cells in zip(*(cells for _, _, cells in columns))]
+    return "\n".join([header, separator] + rows)
+
+class TableRenderer:
+    """Rendered pages of one display_table session.
+
+    A page is cut from a source (the displayed frame, or the pager while a feed is
+    paged) by its row range. Redrawing a page that is already rendered reuses its
+    formatted rows and column widths; a new source (filters, cleared filters, a
+    reloaded frame) drops every page of the old one.
+    """
+
+    def __init__(self, cache_pages=RENDER_CACHE_PAGES):
+        self.cache_pages = cache_pages
+        self.source = None
+        self.pages = OrderedDict()
+        self.hits = self.misses = 0
+
+    def render(self, source, start, stop, applied_configs, rows):
+        """The formatted rows [start, stop) of source; rows(start, stop) cuts the page on a miss."""
+        if source is not self.source:
+            self.source = source
+            self.pages.clear()
+        key = (start, stop, tuple(applied_configs))
+        if key in self.pages:
+            self.hits += 1
+            self.pages.move_to_end(key)
+            return self.pages[key]
+        self.misses += 1
+        self.pages[key] = format_table_columns(rows(start, stop), applied_configs)
+        while len(self.pages) > self.cache_pages:
+            self.pages.popitem(last=False)
+        return self.pages[key]
@@ -1,15 +1,21 @@
+import numpy as np
 import pandas as pd
 from ui_utils import menu_selection, format_filter_display
 from wallet_config import load_wallets
 import os
 import json
 from config import WALLETS_FILE
+from utils import convert_fundtime_to_hours, fundtime_hours, float32_bounds, float32_decimal, FLOAT32_COLUMNS
 
-def filter_table(df, table_name, existing_filters):
-    filter_options = [col for col in df.columns if col not in ['#', 'Iteration']] + ["Back"]
+EXACT_FILTER_COLUMNS = ["Name", "Links", "FreshDeployer", "Desc", "token_name"]
+PERCENT_FILTER_COLUMNS = ["Liq%", "Bundle", "Dev%", "B-Ratio"]
+
+def prompt_filters(columns, table_name, existing_filters):
+    """Ask for filters on the given columns; returns the updated filters dict."""
+    filter_options = [col for col in columns if col not in ['#', 'Iteration', 'token_id', 'feed_rowid', 'FundingHours']] + ["Back"]
     filters = existing_filters.copy()
     table_str = "\n".join([format_filter_display(k, v) for k, v in filters.items()]) if filters else "No filters applied."
-    is_top_table = 'token_name' in df.columns
+    is_top_table = 'token_name' in columns
     
     while True:
         choice = menu_selection(filter_options, table_str, prompt=f"Filter {table_name} by:")
@@ -17,7 +23,7 @@ def filter_table(df, table_name, existing_filters):
             break
         
         column = choice
-        if column in ["Name", "Links", "FreshDeployer", "Desc", "token_name"]:
+        if column in EXACT_FILTER_COLUMNS:
             value = menu_selection(filter_options, table_str, prompt=f"Enter {column} value (or blank for any): ", allow_input=True)
             if value:
                 filters[column] = value
@@ -37,7 +43,7 @@ def filter_table(df, table_name, existing_filters):
                 input()
                 continue
             filters[column] = (min_val, max_val)
-        elif column in ["Liq%", "Bundle", "Dev%", "B-Ratio"] and not is_top_table:
+        elif column in PERCENT_FILTER_COLUMNS and not is_top_table:
             max_val = menu_selection(filter_options, table_str, prompt=f"Enter max {column} % (or blank): ", allow_input=True)
             try:
                 max_float = float(max_val) / 100 if max_val else float('inf')
@@ -46,11 +52,11 @@ def filter_table(df, table_name, existing_filters):
                 print("Invalid number format. Press any key to continue...")
                 input()
         elif column == "FundingTime" and not is_top_table:
-            min_val = menu_selection(filter_options, table_str, prompt="Enter min FundingTime (e.g., '14h', or blank): ", allow_input=True)
-            try:
-                min_float = float(min_val.replace('h', '')) if min_val else 0
-                filters[column] = {"min": min_float}
-            except ValueError:
+            min_val = menu_selection(filter_options, table_str, prompt="Enter min FundingTime (e.g., '14h', '30m', or blank): ", allow_input=True)
+            min_hours = convert_fundtime_to_hours(min_val) if min_val else 0
+            if pd.notna(min_hours):
+                filters[column] = {"min": min_hours}
+            else:
                 print("Invalid number format. Press any key to continue...")
                 input()
         else:
@@ -66,45 +72,136 @@ def filter_table(df, table_name, existing_filters):
         
         table_str = "\n".join([format_filter_display(k, v) for k, v in filters.items()]) if filters else "No filters applied."
     
-    filtered_df = df.copy()
+    return filters
+
+def date_bounds(value, tz=None):
+    """(min, max) Timestamps of a Date filter, None for an open end; naive bounds are taken as tz."""
+    bounds = []
+    for bound in value:
+        if not isinstance(bound, pd.Timestamp):
+            bounds.append(None)
+        elif tz is not None and bound.tzinfo is None:
+            bounds.append(bound.tz_localize(tz))
+        else:
+            bounds.append(bound)
+    return bounds
+
+def filter_bounds(column, low, high):
+    """(low, high) of a numeric filter on column as numpy float64s.
+
+    On a float32 feed column they are widened by float32_bounds, so a filter keeps the
+    same rows in SQL, on compacted frames and on frames loaded without compacting.
+    Numpy scalars keep the comparison in float64, where a Python float would be cast
+    down to a float32 column's precision.
+    """
+    if column in FLOAT32_COLUMNS:
+        low, high = float32_bounds(low, high)
+    return np.float64(low), np.float64(high)
+
+def range_mask(series, low, high):
+    """Rows of series within [low, high]; a missing nullable int compares as NA, which fails like NaN."""
+    return ((series >= low) & (series <= high)).fillna(False)
+
+def apply_filters(df, filters):
+    """Apply a filters dict to a frame in memory and renumber its '#' column."""
+    filtered_df = df
     for column, value in filters.items():
-        if column in ["Name", "Links", "FreshDeployer", "Desc", "token_name"]:
+        if column not in filtered_df.columns:
+            continue
+        if column in EXACT_FILTER_COLUMNS:
             filtered_df = filtered_df[filtered_df[column] == value]
         elif column == "Date":
-            min_val, max_val = value
-            filtered_df = filtered_df[(filtered_df[column] >= min_val) & (filtered_df[column] <= max_val)]
-        elif column in ["Liq%", "Bundle", "Dev%", "B-Ratio"]:
-            filtered_df = filtered_df[filtered_df[column] <= value["max"]]
-        elif column == "FundingTime":
-            filtered_df = filtered_df[filtered_df[column].str.extract(r'(\d+)')[0].astype(float) >= value["min"]]
+            # Calls are stored in UTC; filter dates are entered in the same time as displayed
+            min_val, max_val = date_bounds(value, getattr(filtered_df[column].dt, 'tz', None))
+            if min_val is not None:
+                filtered_df = filtered_df[filtered_df[column] >= min_val]
+            if max_val is not None:
+                filtered_df = filtered_df[filtered_df[column] <= max_val]
+        elif isinstance(value, dict):
+            # Percentages and FundingTime store a single bound; FundingTime's is in hours
+            if column == "FundingTime":
+                if 'FundingHours' in filtered_df.columns:
+                    hours = filtered_df['FundingHours']
+                    min_val, _ = filter_bounds('FundingHours', value["min"], float('inf'))
+                else:
+                    hours, min_val = fundtime_hours(filtered_df[column]), value["min"]
+                filtered_df = filtered_df[hours >= min_val]
+            else:
+                bounds = filter_bounds(column, value.get("min", float('-inf')), value.get("max", float('inf')))
+                filtered_df = filtered_df[range_mask(filtered_df[column], *bounds)]
         else:
-            min_val, max_val = value
-            filtered_df = filtered_df[(filtered_df[column] >= min_val) & (filtered_df[column] <= max_val)]
+            filtered_df = filtered_df[range_mask(filtered_df[column], *filter_bounds(column, *value))]
     
     filtered_df = filtered_df.reset_index(drop=True)
     filtered_df['#'] = range(1, len(filtered_df) + 1)
-    return filtered_df, filters
+    return filtered_df
 
-def generate_wallet_summary(df, config_names):
-    if not config_names:
-        return ""
-    summary = []
-    for name in config_names:
-        if name in df.columns:
-            buy_count = (df[name] == "buy").sum()
-            skip_count = (df[name] == "skip").sum()
-            summary.append(f"{name}: {buy_count} buy, {skip_count} skip")
-    return "\n".join(summary) if summary else ""
+def compile_filters(filters, columns):
+    """Compile a filters dict into one parameterised WHERE clause over the given columns.
+
+    Returns (where, params, leftover): where is None when nothing compiled, and leftover
+    holds the filters on columns the query does not have (wallet config columns and the
+    like), which apply_filters evaluates on the loaded rows instead.
+    """
+    clauses = []
+    params = []
+    leftover = {}
+    for column, value in filters.items():
+        # FundingTime compares the FundingHours init_db derives from it
+        if column not in columns or (column == "FundingTime" and 'FundingHours' not in columns):
+            leftover[column] = value
+            continue
+        quoted = f'"{column}"'
+        if column in EXACT_FILTER_COLUMNS:
+            clauses.append(f"{quoted} = ?")
+            params.append(value)
+        elif column == "Date":
+            # Dates are stored as ISO text in UTC, so bounds compare as text and keep the Date index usable
+            min_val, max_val = date_bounds(value)
+            if min_val is not None:
+                clauses.append(f"{quoted} >= ?")
+                params.append(min_val.strftime('%Y-%m-%d %H:%M:%S'))
+            if max_val is not None:
+                clauses.append(f"{quoted} <= ?")
+                params.append(max_val.strftime('%Y-%m-%d %H:%M:%S+00:00'))
+        elif isinstance(value, dict):
+            if column == "FundingTime":
+                # A bound every parsed value meets would walk the whole FundingHours index; + keeps it a scan
+                clauses.append('"FundingHours" >= ?' if value["min"] > 0 else '+"FundingHours" >= ?')
+                params.append(float(filter_bounds('FundingHours', value["min"], float('inf'))[0]))
+            elif "max" in value:
+                clauses.append(f"{quoted} <= ?")
+                params.append(float(filter_bounds(column, float('-inf'), value["max"])[1]))
+            else:
+                clauses.append(f"{quoted} >= ?")
+                params.append(float(filter_bounds(column, value["min"], float('inf'))[0]))
+        else:
+            min_val, max_val = filter_bounds(column, *value)
+            clauses.append(f"{quoted} >= ? AND {quoted} <= ?")
+            params.extend([float(min_val), float(max_val)])
+    return (" AND ".join(clauses) if clauses else None), params, leftover
+
+def filter_table(df, table_name, existing_filters):
+    filters = prompt_filters(df.columns, table_name, existing_filters)
+    return apply_filters(df, filters), filters
+
+def generate_wallet_summary(buy_counts, rows):
+    """One line per applied wallet config, from its buy count out of rows."""
+    return "\n".join(f"{name}: {buys} buy, {rows - buys} skip" for name, buys in buy_counts.items())
 
 def search_contracts_in_pf(contracts, conn, df):
-    pf_df = pd.read_sql_query(f"SELECT token, Date, Mcap, Liq FROM pf WHERE token IN ({','.join(['?']*len(contracts))})", conn, params=contracts)
+    pf_df = pd.read_sql_query(f"SELECT token_id, Date, Mcap, Liq FROM pf WHERE token_id IN ({','.join(['?']*len(contracts))})", conn, params=contracts)
     if not pf_df.empty:
-        merged_df = df.merge(pf_df, on='token', how='left', suffixes=('', '_pf'))
+        merged_df = df.merge(pf_df, on='token_id', how='left', suffixes=('', '_pf'))
         merged_df['MaxMcap'] = merged_df[['MaxMcap', 'Mcap_pf']].max(axis=1)
         merged_df['X\'s'] = (merged_df['MaxMcap'] / merged_df['Mcap']).replace([float('inf'), -float('inf')], 0).fillna(0)
         return merged_df.drop(columns=['Mcap_pf', 'Liq_pf', 'Date_pf'], errors='ignore')
     return df
 
+def config_bound(series, value):
+    """A min or max of series as a wallets.json bound: a float32 value is written as the decimal shown for it."""
+    return float32_decimal(value) if series.dtype == np.float32 else float(value)
+
 def generate_wallet_config_from_rows(df):
     config = {}
     is_top_table = 'token_name' in df.columns
@@ -120,21 +217,23 @@ def generate_wallet_config_from_rows(df):
             if col in df.columns:
                 min_val = df[col].min()
                 max_val = df[col].max()
-                config[col] = {"min": min_val if pd.notna(min_val) else float('-inf'), 
-                              "max": max_val if pd.notna(max_val) else float('inf')}
+                config[col] = {"min": config_bound(df[col], min_val) if pd.notna(min_val) else float('-inf'), 
+                              "max": config_bound(df[col], max_val) if pd.notna(max_val) else float('inf')}
         for col in ['Liq%', 'Bundle', 'Dev%', 'B-Ratio']:
             if col in df.columns:
                 min_val = df[col].min()
                 max_val = df[col].max()
-                config[col] = {"min": min_val if pd.notna(min_val) else float('-inf'), 
-                              "max": max_val if pd.notna(max_val) else float('inf')}
-        if 'FundingTime' in df.columns:
-            funding_mins = df['FundingTime'].str.extract(r'(\d+)').astype(float).dropna()
-            config['FundingTime'] = {"min": funding_mins.min() if not funding_mins.empty else 0}
+                config[col] = {"min": config_bound(df[col], min_val) if pd.notna(min_val) else float('-inf'), 
+                              "max": config_bound(df[col], max_val) if pd.notna(max_val) else float('inf')}
+        if 'FundingHours' in df.columns or 'FundingTime' in df.columns:
+            hours = df['FundingHours'] if 'FundingHours' in df.columns else pd.Series(fundtime_hours(df['FundingTime']))
+            config['Funding'] = {"min": config_bound(hours, hours.min()) if hours.notna().any() else 0}
+        # Yes/No flags load as categoricals (utils.FEED_DTYPES); a Links of None is "Any",
+        # as the wallet editor stores it
         if 'Links' in df.columns:
-            config['Links'] = "Yes" if df['Links'].all() else "Any"
+            config['Links'] = "Yes" if (df['Links'] == "Yes").all() else None
         if 'FreshDeployer' in df.columns:
-            config['FreshDeployer'] = "Yes" if df['FreshDeployer'].all() else "Any"
+            config['FreshDeployer'] = "Yes" if (df['FreshDeployer'] == "Yes").all() else "Any"
         if 'Desc' in df.columns:
-            config['Desc'] = "Yes" if df['Desc'].all() else "Any"
+            config['Desc'] = "Yes" if (df['Desc'] == "Yes").all() else "Any"
     return config
\ No newline at end of file
@@ -1,6 +1,9 @@
 import platform
 import os
-import time
+import sys
+import re
+import shutil
+import atexit
 if platform.system() == "Windows":
     import msvcrt
 else:
@@ -23,12 +26,12 @@ def print_filters(filters):
         elif key in ["Name", "Links", "FreshDeployer", "Desc", "token_name"]:
             filter_strs.append(f"{key}: {value}")
         elif key == "FundingTime":
-            filter_strs.append(f"{key}: >= {value['min']}")
+            filter_strs.append(f"{key}: >= {value['min']:g}h")
         elif key in ["Liq%", "Bundle", "Dev%", "B-Ratio"]:
             filter_strs.append(f"{key}: <= {value['max']*100:.2f}%")
-        elif key == "DevBal":
+        elif key == "DevBal" and isinstance(value, dict):
             filter_strs.append(f"{key}: <= {value['max']:,}")
-        elif key == "X's":
+        elif key == "X's" and isinstance(value, dict):
             filter_strs.append(f"{key}: >= {value['min']:.2f}x")
         else:
             min_val, max_val = value
@@ -46,12 +49,12 @@ def format_filter_display(option, value):
     elif option in ["Name", "Links", "FreshDeployer", "Desc", "token_name"]:
         return f"{option} ({value})"
     elif option == "FundingTime":
-        return f"{option} (>= {value['min']})"
+        return f"{option} (>= {value['min']:g}h)"
     elif option in ["Liq%", "Bundle", "Dev%", "B-Ratio"]:
         return f"{option} (<= {value['max']*100:.2f}%)"
-    elif option == "DevBal":
+    elif option == "DevBal" and isinstance(value, dict):
         return f"{option} (<= {value['max']:,})"
-    elif option == "X's":
+    elif option == "X's" and isinstance(value, dict):
         return f"{option} (>= {value['min']:.2f}x)"
     else:
         min_val, max_val = value
@@ -59,119 +62,242 @@ def format_filter_display(option, value):
         max_str = f"{max_val:,}" if max_val != float('inf') else "No max"
         return f"{option} ({min_str} - {max_str})"
 
-def menu_selection(options, table_str, middle_content="", prompt="Select an option: ", info_message=None, allow_input=False):
-    if platform.system() == "Windows":
-        selected = 0
-        input_buffer = ""
-        os.system('cls')  # Initial clear
-        # Draw menu once initially
-        print(prompt + (input_buffer if allow_input else ""))
-        terminal_height = get_terminal_height()
-        reserved_lines = 5 + (middle_content.count('\n') + 1 if middle_content else 0) + (2 if info_message else 0)
-        max_options = terminal_height - reserved_lines - (table_str.count('\n') + 1 if table_str else 0)
-        visible_options = options[:max(0, min(len(options), max_options))]
-        for i, option in enumerate(visible_options):
-            if i == selected:
-                print(f"> {Fore.CYAN}{option}{Style.RESET_ALL}")
-            else:
-                print(f"  {option}")
-        if info_message:
-            print(f"\n{Fore.YELLOW}{info_message}{Style.RESET_ALL}")
-        if table_str:
-            print(f"\n{table_str}")
-        if middle_content:
-            print(middle_content)
-
-        while True:
-            if msvcrt.kbhit():  # Only redraw on keypress
-                char = msvcrt.getch()
-                if allow_input:
-                    if char == b'\r':  # Enter
-                        return input_buffer if input_buffer else visible_options[selected]
-                    elif char == b'\x08':  # Backspace
-                        input_buffer = input_buffer[:-1]
-                    elif char == b'\x1b':  # ESC
-                        return None
-                    elif char.isalnum() or char in b' ,':
-                        input_buffer += char.decode('utf-8')
-                else:
-                    if char == b'\xe0':  # Arrow key prefix
-                        next_key = msvcrt.getch()
-                        if next_key == b'H':  # Up arrow
-                            selected = max(0, selected - 1)
-                        elif next_key == b'P':  # Down arrow
-                            selected = min(len(visible_options) - 1, selected + 1)
-                    elif char == b'\r':  # Enter key
-                        return visible_options[selected]
-                    elif char == b'\x1b':  # ESC key
-                        return None
-                
-                # Redraw only after keypress
-                os.system('cls')
-                print(prompt + (input_buffer if allow_input else ""))
-                for i, option in enumerate(visible_options):
-                    if i == selected:
-                        print(f"> {Fore.CYAN}{option}{Style.RESET_ALL}")
-                    else:
-                        print(f"  {option}")
-                if info_message:
-                    print(f"\n{Fore.YELLOW}{info_message}{Style.RESET_ALL}")
-                if table_str:
-                    print(f"\n{table_str}")
-                if middle_content:
-                    print(middle_content)
-            time.sleep(0.01)  # Small sleep to reduce CPU usage
-
-    else:  # Linux/Unix with curses
-        def curses_menu(stdscr):
-            curses.curs_set(1 if allow_input else 0)
+ANSI_SGR = re.compile(r'\x1b\[([0-9;]*)m')
+# colorama foreground codes used by menus and tables, as curses color pairs
+CURSES_PAIRS = {'36': 1, '33': 2, '32': 3, '31': 4}
+
+def ansi_segments(line):
+    """Split a line into (text, color code) runs; the code is None where no color is set."""
+    segments = []
+    code = None
+    pos = 0
+    for match in ANSI_SGR.finditer(line):
+        if match.start() > pos:
+            segments.append((line[pos:match.start()], code))
+        params = match.group(1)
+        code = None if params in ('', '0', '39') else params.split(';')[-1]
+        pos = match.end()
+    if pos < len(line):
+        segments.append((line[pos:], code))
+    return segments
+
+def option_line(option, selected):
+    return f"> {Fore.CYAN}{option}{Style.RESET_ALL}" if selected else f"  {option}"
+
+def menu_layout(options, table_str, middle_content, prompt, info_message):
+    """Screen lines of a menu: prompt, options, then the info message, table and middle content."""
+    lines = [prompt] + [option_line(option, i == 0) for i, option in enumerate(options)]
+    if info_message:
+        lines += ["", f"{Fore.YELLOW}{info_message}{Style.RESET_ALL}"]
+    if table_str:
+        lines += [""] + table_str.split('\n')
+    if middle_content:
+        lines += middle_content.split('\n')
+    return lines
+
+class Screen:
+    """The terminal for the whole CLI run, shared by every menu.
+
+    menu() paints the screen once per call, clipped to the terminal, and then only
+    redraws what a key changes: the two option lines a selection moves between, or
+    the prompt line while typing. A keystroke costs the same however large the table
+    is. A resize repaints everything. Between menus the screen is suspended so
+    callers can print() and input() as usual.
+    """
+
+    def menu(self, options, table_str, middle_content, prompt, info_message, allow_input):
+        self.resume(allow_input)
+        try:
+            lines = menu_layout(options, table_str, middle_content, prompt, info_message)
+            self.paint(lines)
             selected = 0
             input_buffer = ""
             while True:
-                stdscr.clear()
-                stdscr.addstr(0, 0, prompt + input_buffer)
-                for i, option in enumerate(options):
-                    if i == selected:
-                        stdscr.addstr(i + 1, 0, f"> {option}", curses.color_pair(1))
-                    else:
-                        stdscr.addstr(i + 1, 0, f"  {option}")
-                if info_message:
-                    stdscr.addstr(len(options) + 2, 0, info_message, curses.color_pair(2))
-                if table_str:
-                    stdscr.addstr(len(options) + 4, 0, table_str)
-                if middle_content:
-                    stdscr.addstr(len(options) + 5 + table_str.count('\n'), 0, middle_content)
-                stdscr.refresh()
-                
-                key = stdscr.getch()
-                if allow_input:
-                    if key == 10:  # Enter
-                        return input_buffer if input_buffer else options[selected]
-                    elif key == 27:  # ESC
-                        return None
-                    elif key == curses.KEY_BACKSPACE or key == 127:
-                        input_buffer = input_buffer[:-1]
-                    elif 32 <= key <= 126:  # Printable characters
-                        input_buffer += chr(key)
-                    continue
-                if key == curses.KEY_UP:
-                    selected = (selected - 1) % len(options)
-                elif key == curses.KEY_DOWN:
-                    selected = (selected + 1) % len(options)
-                elif key == 10:  # Enter
-                    return options[selected]
-                elif key == 27:  # ESC
+                key = self.read_key()
+                if key == 'resize':
+                    lines[0] = prompt + input_buffer
+                    self.paint(lines)
+                elif key == 'esc':
                     return None
-        
-        curses.initscr()
+                elif key == 'enter':
+                    if allow_input and (input_buffer or not options):
+                        return input_buffer
+                    return options[selected] if options else None
+                elif allow_input:
+                    if key == 'backspace':
+                        input_buffer = input_buffer[:-1]
+                    elif key is not None and len(key) == 1:
+                        input_buffer += key
+                    else:
+                        continue
+                    lines[0] = prompt + input_buffer
+                    self.put(0, lines[0])
+                elif key in ('up', 'down') and options:
+                    previous = selected
+                    selected = (selected + (1 if key == 'down' else -1)) % len(options)
+                    lines[1 + previous] = option_line(options[previous], False)
+                    lines[1 + selected] = option_line(options[selected], True)
+                    self.put(1 + previous, lines[1 + previous])
+                    self.put(1 + selected, lines[1 + selected])
+        finally:
+            self.suspend()
+
+class CursesScreen(Screen):
+    def __init__(self):
+        # ESC would otherwise wait a second for the rest of an escape sequence
+        os.environ.setdefault('ESCDELAY', '25')
+        self.stdscr = curses.initscr()
+        curses.noecho()
+        curses.cbreak()
+        self.stdscr.keypad(True)
         curses.start_color()
         curses.init_pair(1, curses.COLOR_CYAN, curses.COLOR_BLACK)
         curses.init_pair(2, curses.COLOR_YELLOW, curses.COLOR_BLACK)
-        result = curses.wrapper(curses_menu)
-        return result
+        curses.init_pair(3, curses.COLOR_GREEN, curses.COLOR_BLACK)
+        curses.init_pair(4, curses.COLOR_RED, curses.COLOR_BLACK)
+        self.active = True
+        self.prompt_end = 0
+        atexit.register(self.suspend)
+
+    def resume(self, allow_input):
+        # Whatever was printed while suspended is unknown to curses, so the next paint is a full one
+        self.stdscr.clearok(True)
+        self.active = True
+        try:
+            curses.curs_set(1 if allow_input else 0)
+        except curses.error:
+            pass
+
+    def suspend(self):
+        if self.active:
+            self.active = False
+            curses.endwin()
+
+    def draw(self, row, line):
+        height, width = self.stdscr.getmaxyx()
+        if row >= height:
+            return
+        self.stdscr.move(row, 0)
+        self.stdscr.clrtoeol()
+        col = 0
+        for text, code in ansi_segments(line):
+            if col >= width:
+                break
+            text = text[:width - col]
+            try:
+                self.stdscr.addstr(row, col, text, curses.color_pair(CURSES_PAIRS.get(code, 0)))
+            except curses.error:
+                pass  # writing the bottom right cell moves the cursor off screen
+            col += len(text)
+        if row == 0:
+            self.prompt_end = min(col, width - 1)
+
+    def paint(self, lines):
+        self.stdscr.erase()
+        for row, line in enumerate(lines):
+            self.draw(row, line)
+        self.stdscr.move(0, self.prompt_end)  # the cursor waits after the prompt
+        self.stdscr.refresh()
+
+    def put(self, row, line):
+        self.draw(row, line)
+        self.stdscr.move(0, self.prompt_end)
+        self.stdscr.refresh()
+
+    def read_key(self):
+        key = self.stdscr.getch()
+        if key == curses.KEY_RESIZE:
+            curses.update_lines_cols()
+            return 'resize'
+        if key in (10, 13, curses.KEY_ENTER):
+            return 'enter'
+        if key == 27:
+            return 'esc'
+        if key in (curses.KEY_BACKSPACE, 127, 8):
+            return 'backspace'
+        if key == curses.KEY_UP:
+            return 'up'
+        if key == curses.KEY_DOWN:
+            return 'down'
+        if 32 <= key <= 126:
+            return chr(key)
+        return None
+
+class ConsoleScreen(Screen):
+    """Windows console, drawn with the ANSI cursor sequences colorama translates."""
+
+    def __init__(self):
+        self.size = shutil.get_terminal_size()
+        self.rows = 0
+        self.pending = None
+
+    def resume(self, allow_input):
+        pass
+
+    def suspend(self):
+        # Leave the cursor under the menu for whatever the caller prints next
+        sys.stdout.write(f"\x1b[{self.rows + 1};1H")
+        sys.stdout.flush()
+
+    def clip(self, line):
+        """line cut to one column short of the width, so the console never wraps or scrolls."""
+        width = self.size.columns - 1
+        out = []
+        col = 0
+        colored = False
+        for text, code in ansi_segments(line):
+            if col >= width:
+                break
+            text = text[:width - col]
+            out.append(f"\x1b[{code}m{text}" if code else f"{Style.RESET_ALL if colored else ''}{text}")
+            colored = code is not None
+            col += len(text)
+        return "".join(out) + (Style.RESET_ALL if colored else "")
+
+    def paint(self, lines):
+        lines = lines[:self.size.lines - 1]
+        self.rows = len(lines)
+        sys.stdout.write("\x1b[2J\x1b[H" + "\n".join(self.clip(line) for line in lines) + f"\x1b[1;{len(lines[0]) + 1}H")
+        sys.stdout.flush()
+
+    def put(self, row, line):
+        if row < self.rows:
+            sys.stdout.write(f"\x1b[{row + 1};1H\x1b[2K{self.clip(line)}")
+            sys.stdout.flush()
+
+    def read_key(self):
+        if self.pending is not None:
+            key, self.pending = self.pending, None
+            return key
+        char = msvcrt.getwch()  # blocks until a key arrives
+        if char in ('\x00', '\xe0'):  # arrow and function key prefix
+            key = {'H': 'up', 'P': 'down'}.get(msvcrt.getwch())
+        elif char == '\r':
+            key = 'enter'
+        elif char == '\x1b':
+            key = 'esc'
+        elif char == '\x08':
+            key = 'backspace'
+        else:
+            key = char if char.isprintable() else None
+        # The console sends no resize event; a changed size is noticed at the next key
+        size = shutil.get_terminal_size()
+        if size != self.size:
+            self.size = size
+            self.pending = key
+            return 'resize'
+        return key
+
+SCREEN = None
+
+def get_screen():
+    global SCREEN
+    if SCREEN is None:
+        SCREEN = ConsoleScreen() if platform.system() == "Windows" else CursesScreen()
+    return SCREEN
+
+def menu_selection(options, table_str, middle_content="", prompt="Select an option: ", info_message=None, allow_input=False):
+    return get_screen().menu(options, table_str, middle_content, prompt, info_message, allow_input)
 
 def get_terminal_height():
-    if platform.system() == "Windows":
-        return int(os.get_terminal_size().lines)
-    else:
-        return int(os.popen('tput lines').read())
\ No newline at end of file
+    return shutil.get_terminal_size().lines
@@ -1,5 +1,21 @@
+import numpy as np
 import pandas as pd
 
+# Dtypes loaded feed frames are given by compact_feed. Yes/No flags and the strings a
+# feed repeats on every call become one-byte categoricals; ratios and dev balances,
+# entered with a few significant digits, fit float32 (every bound on them goes through
+# float32_bounds); counts become nullable ints. Mcap and Liq stay float64: float32 holds
+# whole dollars only up to 2**24, and the table shows them to the dollar. Unlisted
+# columns keep their loaded dtype.
+FEED_DTYPES = {
+    'Links': 'category', 'FreshDeployer': 'category', 'Desc': 'category',
+    'Name': 'category', 'FundingTime': 'category', 'FundingSource': 'category', 'Funding': 'category',
+    'Liq%': 'float32', 'Bundle': 'float32', 'Dev%': 'float32',
+    'B-Ratio': 'float32', 'DevBal': 'float32', 'FundingHours': 'float32',
+    'AG': 'Int16', 'F': 'Int16', 'KYC': 'Int16', 'Unq': 'Int16', 'SM': 'Int16', 'Drained': 'Int16', 'TTC': 'Int32',
+}
+FLOAT32_COLUMNS = [col for col, dtype in FEED_DTYPES.items() if dtype == 'float32']
+
 def format_criteria_value(key, value):
     """Format criteria values for display."""
     if key == "Targeted Feed":
@@ -41,9 +57,10 @@ def format_criteria_value(key, value):
                 return f"${min_val:,.0f} - ${max_val:,.0f}"
 
 def convert_fundtime_to_hours(fundtime):
-    """Convert FundTime string to hours."""
+    """Convert FundTime string to hours; a Funding string ('14h (Binance)') converts by its FundTime part."""
     if pd.isna(fundtime) or not isinstance(fundtime, str):
         return float('nan')
+    fundtime = fundtime.split(' (')[0]
     try:
         if 'h' in fundtime:
             return float(fundtime.replace('h', ''))
@@ -51,4 +68,45 @@ def convert_fundtime_to_hours(fundtime):
             return float(fundtime.replace('m', '')) / 60
         return float(fundtime)
     except ValueError:
-        return float('nan')
\ No newline at end of file
+        return float('nan')
+
+def fundtime_hours(fundtimes):
+    """convert_fundtime_to_hours over a Series, parsing each distinct value once."""
+    codes, uniques = pd.factorize(fundtimes)
+    # Missing values get code -1, which picks the trailing NaN
+    return np.array([convert_fundtime_to_hours(x) for x in uniques] + [float('nan')], dtype=float)[codes]
+
+def compact_feed(df):
+    """Give a loaded feed frame the FEED_DTYPES plan; a column whose values do not fit stays as loaded."""
+    for col, dtype in FEED_DTYPES.items():
+        if col in df.columns:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (TypeError, ValueError):
+                pass  # fractional or out of range counts
+    return df
+
+
+def float32_decimal(value):
+    """The shortest decimal with the same float32 as value: 1.28 for the 1.2799999713897705 a float32 1.28 widens to."""
+    return float(np.format_float_positional(np.float32(value)))
+
+def float32_bounds(low, high):
+    """Inclusive float64 bounds met by exactly the values whose float32 lies in [float32(low), float32(high)].
+
+    A float32 column compares its values at float32 precision, SQL and uncompacted
+    frames compare the float64 values; with these bounds both decide alike. Each bound
+    moves out to the edge of the interval of float64s rounding to its float32, or just
+    inside the edge when the edge itself rounds to the neighbouring float32 (ties go
+    to the even one). Works on scalars and arrays alike.
+    """
+    with np.errstate(over='ignore'):
+        low32, high32 = np.asarray(low, dtype=float).astype(np.float32), np.asarray(high, dtype=float).astype(np.float32)
+    below = np.nextafter(low32, np.float32(-np.inf)).astype(float)
+    above = np.nextafter(high32, np.float32(np.inf)).astype(float)
+    low_edge = (below + low32) / 2
+    high_edge = (above + high32) / 2
+    low_edge = np.where(low32.view(np.uint32) & 1, np.nextafter(low_edge, np.inf), low_edge)
+    high_edge = np.where(high32.view(np.uint32) & 1, np.nextafter(high_edge, -np.inf), high_edge)
+    # Infinite bounds stay infinite
+    return np.where(np.isinf(low32), low32, low_edge), np.where(np.isinf(high32), high32, high_edge)
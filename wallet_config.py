@@ -1,6 +1,9 @@
 import json
 import os
+import numpy as np
+import pandas as pd
 from config import WALLETS_FILE
+from utils import fundtime_hours, float32_bounds, FLOAT32_COLUMNS
 
 DEFAULT_CRITERIA = {
     "Mcap": {"min": float('-inf'), "max": float('inf')},
@@ -17,6 +20,10 @@ DEFAULT_CRITERIA = {
     "SM": {"min": float('-inf'), "max": float('inf')},
     "X's": {"min": float('-inf')}
 }
+RANGE_KEYS = ["Mcap", "Liq", "AG", "F", "KYC", "Unq", "SM", "DevBal"]
+MAX_KEYS = ["Bundle", "Dev%"]
+WALLET_DECISIONS = ["buy", "skip"]
+HISTORY_COLUMNS = ["Wallet", "Feed", "Buys", "2x+", "Avg X's", "Max X's"]
 
 def load_wallets():
     if not os.path.exists(WALLETS_FILE):
@@ -29,42 +36,172 @@ def save_wallets(wallets):
     with open(WALLETS_FILE, 'w') as f:
         json.dump(wallets, f, indent=4)
 
-def apply_wallet_config(df, config_name, criteria):
-    df = df.copy()
-    result = []
-    for _, row in df.iterrows():
-        meets_criteria = True
+def criterion_bounds(key, condition):
+    """Inclusive (low, high) a criterion puts on the values criterion_values gives its column."""
+    if key in RANGE_KEYS:
+        return condition.get("min", float('-inf')), condition.get("max", float('inf'))
+    if key in MAX_KEYS:
+        return float('-inf'), condition.get("max", float('inf'))
+    if key == "X's":
+        return condition.get("min", float('-inf')), float('inf')
+    if key == "Funding":
+        return condition.get("min", 0), float('inf')
+    if key == "Links" and condition is not None:
+        return 1.0, 1.0
+    return float('-inf'), float('inf')
+
+def criterion_column(df, key):
+    """The column of df a criterion on key reads: FundingHours for Funding where the frame has it."""
+    return df['FundingHours'] if key == "Funding" and 'FundingHours' in df.columns else df[key]
+
+def criterion_values(df, key, condition):
+    """The column of key in df as floats for criterion_bounds; NaN wherever the value is missing.
+
+    Funding is read from FundingHours; Links becomes 1.0 where it equals the condition;
+    any other non-numeric key only needs a value, so it becomes 0.0.
+    """
+    column = criterion_column(df, key)
+    if key == "Funding":
+        if column.name == 'FundingHours':
+            return column.to_numpy(dtype=float, na_value=np.nan)
+        return fundtime_hours(column)  # frames without the FundingHours init_db stores at ingest
+    if key in RANGE_KEYS or key in MAX_KEYS or key == "X's":
+        return column.to_numpy(dtype=float, na_value=np.nan)
+    present = column.notna().to_numpy()
+    if key == "Links" and condition is not None:
+        return np.where(present, (column == condition).to_numpy(dtype=float, na_value=0.0), np.nan)
+    return np.where(present, 0.0, np.nan)
+
+def wallet_matrix(df, wallets):
+    """Boolean (row x wallet) matrix of the rows each criteria dict in wallets buys.
+
+    Every criterion is an inclusive low/high bound (criterion_bounds), so the wallets
+    sharing a column give one vector of lows and one of highs. Together they cut the
+    column into intervals; one broadcast over the bound vectors decides which wallets
+    pass in each interval, packed 64 wallets to a word, and each row then only looks
+    up its interval. A column costs about one pass however many wallets use it.
+    A missing value fails every wallet with a criterion on its column; criteria on
+    columns df lacks are ignored.
+    """
+    wallets = list(wallets)
+    words = -(-len(wallets) // 64)
+    passed = np.full((len(df), words), np.iinfo(np.uint64).max, dtype=np.uint64)
+    groups = {}
+    for j, criteria in enumerate(wallets):
         for key, condition in criteria.items():
             if key not in df.columns:
                 continue
-            value = row[key]
-            if pd.isna(value):
-                meets_criteria = False
-                break
-            if key == "Links":
-                if condition is not None and value != condition:
-                    meets_criteria = False
-            elif key in ["Mcap", "Liq", "AG", "F", "KYC", "Unq", "SM", "DevBal"]:
-                min_val = condition.get("min", float('-inf'))
-                max_val = condition.get("max", float('inf'))
-                if not (min_val <= value <= max_val):
-                    meets_criteria = False
-            elif key in ["Bundle", "Dev%"]:
-                max_val = condition.get("max", float('inf'))
-                if value > max_val:
-                    meets_criteria = False
-            elif key == "Funding":
-                min_val = condition.get("min", 0)
-                from utils import convert_fundtime_to_hours
-                hours = convert_fundtime_to_hours(value.split(' (')[0]) if '(' in value else float('nan')
-                if pd.isna(hours) or hours < min_val:
-                    meets_criteria = False
-            elif key == "X's":
-                min_val = condition.get("min", float('-inf'))
-                if value < min_val:
-                    meets_criteria = False
-        result.append("buy" if meets_criteria else "skip")
-    return result
+            # Links values are compared once per distinct condition
+            group = (key, condition if key == "Links" else None)
+            groups.setdefault(group, []).append((j, *criterion_bounds(key, condition)))
+    for (key, condition), uses in groups.items():
+        values = criterion_values(df, key, condition)
+        columns, low, high = (np.array(x) for x in zip(*uses))
+        low, high = low.astype(float), high.astype(float)
+        if criterion_column(df, key).name in FLOAT32_COLUMNS:
+            # Decided at float32 precision, as compile_criteria does, whether or not df is compacted
+            low, high = float32_bounds(low, high)
+        edges = np.unique(np.concatenate([low, high]))
+        # Interval 2i lies strictly between edges i-1 and i, interval 2i+1 is edge i itself
+        # and the last one holds missing values
+        position = np.searchsorted(edges, values)
+        exact = edges[np.minimum(position, len(edges) - 1)] == values
+        intervals = np.where(np.isnan(values), 2 * len(edges) + 1, 2 * position + exact)
+        below = np.concatenate([[float('-inf')], edges])[:, None]
+        above = np.concatenate([edges, [float('inf')]])[:, None]
+        table = np.ones((2 * len(edges) + 2, 64 * words), dtype=bool)
+        table[0:-1:2, columns] = (low <= below) & (high >= above)
+        table[1:-2:2, columns] = (low <= edges[:, None]) & (high >= edges[:, None])
+        table[-1, columns] = False
+        passed &= np.packbits(table, axis=1).view(np.uint64)[intervals]
+    return np.unpackbits(passed.view(np.uint8), axis=1, count=len(wallets)).view(bool)
+
+def criteria_mask(df, criteria):
+    """Boolean mask of the rows meeting every criterion of one wallet config."""
+    return wallet_matrix(df, [criteria])[:, 0]
+
+def wallet_columns(matrix, names, index):
+    """buy/skip columns of a wallet matrix, as one-byte categoricals."""
+    return pd.DataFrame({name: pd.Categorical.from_codes((~matrix[:, j]).astype(np.int8), WALLET_DECISIONS)
+                         for j, name in enumerate(names)}, index=index)
+
+def compile_criteria(criteria, columns, fundings=()):
+    """Compile a wallet's criteria into one parameterised WHERE clause over a feed's columns.
+
+    Returns (where, params) selecting the rows criteria_mask buys: a NULL in any
+    criterion's column fails, and criteria on columns the feed lacks (Targeted Feed
+    among them) are ignored. Funding compares FundingHours; on a feed stored without
+    it, fundings are the distinct Funding values and Funding compiles to the ones
+    whose hours pass, so no row is parsed in SQL.
+    """
+    clauses = []
+    params = []
+    for key, condition in criteria.items():
+        if key not in columns:
+            continue
+        quoted = '"{}"'.format(key.replace('"', '""'))
+        low, high = criterion_bounds(key, condition)
+        if key in FLOAT32_COLUMNS or (key == "Funding" and "FundingHours" in columns):
+            # The float64 bounds meeting what wallet_matrix decides on float32 values
+            low, high = (float(bound) for bound in float32_bounds(low, high))
+        if key == "Funding" and "FundingHours" in columns:
+            # + keeps the FundingHours index out of it: a wallet usually buys a large share
+            # of its feed, and walking the index to most rows is slower than the scan
+            clauses.append('+"FundingHours" >= ?')
+            params.append(low)
+            continue
+        if key == "Funding":
+            hours = fundtime_hours(pd.Series(fundings, dtype=object))
+            passing = [value for value, h in zip(fundings, hours) if low <= h <= high]
+            clauses.append(f"{quoted} IN ({', '.join('?' * len(passing))})" if passing else "0")
+            params.extend(passing)
+            continue
+        bounded = []
+        if key == "Links" and condition is not None:
+            bounded.append(f"{quoted} = ?")
+            params.append(condition)
+        elif key in RANGE_KEYS or key in MAX_KEYS or key == "X's":
+            if low != float('-inf'):
+                bounded.append(f"{quoted} >= ?")
+                params.append(low)
+            if high != float('inf'):
+                bounded.append(f"{quoted} <= ?")
+                params.append(high)
+        # A comparison already fails on NULL
+        clauses += bounded or [f"{quoted} IS NOT NULL"]
+    return (" AND ".join(clauses) if clauses else "1"), params
+
+def wallet_history(conn, wallets, catalog=None):
+    """Buys, 2x+ buys, average and max X's of every wallet over the whole history of its feeds.
+
+    A wallet's Targeted Feed ('Fomo', 'PF') picks its feed; without one it is counted on
+    every feed. Each wallet is one aggregate query over the feed and its _enriched
+    table (for X's), so no rows reach pandas.
+    """
+    from data_loader import Catalog
+    catalog = catalog or Catalog(conn)
+    rows = []
+    for feed in catalog.tables():
+        entry = catalog.entry(feed)
+        targeted = [(name, criteria) for name, criteria in wallets.items()
+                    if not criteria.get("Targeted Feed") or criteria["Targeted Feed"].lower().replace(' ', '_') == feed]
+        if entry['kind'] != 'regular' or not entry['view_name'] or not targeted:
+            continue
+        # token_id is in both tables and never a criterion
+        columns = [col for col in entry['columns'] if col != 'token_id'] + ['MaxMcap', "X's"]
+        fundings = ()
+        if 'Funding' in columns and 'FundingHours' not in columns and any('Funding' in criteria for _, criteria in targeted):
+            fundings = [value for (value,) in conn.execute(f'SELECT DISTINCT "Funding" FROM {feed} WHERE "Funding" IS NOT NULL')]
+        display_name = feed.replace('_', ' ').title()
+        for name, criteria in targeted:
+            where, params = compile_criteria(criteria, columns, fundings)
+            result = conn.execute(f"""SELECT COUNT(*), COUNT(*) FILTER (WHERE e."X's" >= 2), AVG(e."X's"), MAX(e."X's")
+                FROM {feed} f LEFT JOIN {feed}_enriched e ON e.feed_rowid = f.rowid WHERE {where}""", params).fetchone()
+            rows.append([name, display_name, *result])
+    return pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+
+def apply_wallet_config(df, config_name, criteria):
+    return np.where(criteria_mask(df, criteria), "buy", "skip").tolist()
 
 def create_wallet_config(name, criteria):
     wallets = load_wallets()
@@ -0,0 +1,258 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+from config import DATA_DIRECTORY
+from wallet_config import load_wallets, wallet_matrix, criterion_bounds
+from utils import compact_feed
+
+SIGNAL_BATCH_ROWS = 100000  # feed rows per wallet_matrix call
+SYNC_TIMEOUT = 1  # seconds signal_matrix waits for data.db before deciding in memory
+# Enriched columns, re-resolved in place when a token's Top or MCAPS row changes
+ENRICHED_KEYS = ["MaxMcap", "X's"]
+SIGNAL_TABLES = ['wallet_signal_state', 'wallet_signals', 'wallet_signal_dirty']
+
+def criteria_hash(criteria):
+    """Hash of a wallet's criteria; signals written under another hash are stale."""
+    return hashlib.sha1(json.dumps(criteria, sort_keys=True).encode()).hexdigest()[:16]
+
+def reads_enriched(criteria):
+    """Whether a wallet's decisions change when a row's MaxMcap or X's is re-resolved."""
+    return any(key in criteria and criterion_bounds(key, criteria[key]) != (float('-inf'), float('inf'))
+               for key in ENRICHED_KEYS)
+
+def create_signal_tables(cursor):
+    """Create the wallet signal tables.
+
+    wallet_signal_state has one signal_id per (feed, wallet, criteria hash) and the
+    feed rowid every row up to which is decided. wallet_signals holds the buys, keyed
+    (signal_id, feed_rowid); a decided row without one is a skip. wallet_signal_dirty
+    queues the feed rows whose MaxMcap or X's changed since they were decided.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wallet_signal_state (
+            signal_id INTEGER PRIMARY KEY,
+            feed TEXT,
+            wallet TEXT,
+            criteria_hash TEXT,
+            reads_enriched INTEGER,
+            evaluated_rowid INTEGER,
+            UNIQUE (feed, wallet)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wallet_signals (
+            signal_id INTEGER,
+            feed_rowid INTEGER,
+            PRIMARY KEY (signal_id, feed_rowid)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wallet_signal_dirty (
+            feed TEXT,
+            feed_rowid INTEGER,
+            PRIMARY KEY (feed, feed_rowid)
+        ) WITHOUT ROWID
+    """)
+
+def mark_signals_dirty(cursor, feed, rowids_sql, params=()):
+    """Queue the feed rows rowids_sql selects for the wallets whose decisions read MaxMcap or X's."""
+    create_signal_tables(cursor)
+    cursor.execute("SELECT 1 FROM wallet_signal_state WHERE feed = ? AND reads_enriched LIMIT 1", (feed,))
+    if cursor.fetchone():
+        cursor.execute(f"INSERT OR IGNORE INTO wallet_signal_dirty (feed, feed_rowid) SELECT ?, r.* FROM ({rowids_sql}) r",
+                       (feed, *params))
+
+def rollback_signals(cursor, feed, source_id):
+    """Drop the signals of the feed rows source_id is about to lose.
+
+    Decided rowids above the feed's remaining last row are given back too: SQLite
+    hands them out again to the next rows appended.
+    """
+    create_signal_tables(cursor)
+    rowids = f"SELECT rowid FROM {feed} WHERE source_id = ?"
+    cursor.execute(f"""DELETE FROM wallet_signals WHERE signal_id IN (SELECT signal_id FROM wallet_signal_state WHERE feed = ?)
+                       AND feed_rowid IN ({rowids})""", (feed, source_id))
+    cursor.execute(f"DELETE FROM wallet_signal_dirty WHERE feed = ? AND feed_rowid IN ({rowids})", (feed, source_id))
+    cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {feed} WHERE source_id IS NOT ?", (source_id,))
+    cursor.execute("UPDATE wallet_signal_state SET evaluated_rowid = MIN(evaluated_rowid, ?) WHERE feed = ?",
+                   (cursor.fetchone()[0], feed))
+
+def reset_signals(cursor, feed):
+    """Forget every decision on feed, for when its rows were rewritten in place or renumbered.
+
+    Wallets keep their signal_id; the next sync decides the whole feed again.
+    """
+    create_signal_tables(cursor)
+    cursor.execute("DELETE FROM wallet_signals WHERE signal_id IN (SELECT signal_id FROM wallet_signal_state WHERE feed = ?)", (feed,))
+    cursor.execute("DELETE FROM wallet_signal_dirty WHERE feed = ?", (feed,))
+    cursor.execute("UPDATE wallet_signal_state SET evaluated_rowid = 0 WHERE feed = ?", (feed,))
+
+def signal_rows(conn, view, columns, where, params, after=0):
+    """The columns of view's rows past rowid after matching where, SIGNAL_BATCH_ROWS at a time."""
+    select = ''.join(', "{}"'.format(col.replace('"', '""')) for col in columns)
+    last = after
+    while True:
+        chunk = pd.read_sql_query(f"SELECT feed_rowid{select} FROM {view} WHERE feed_rowid > ? AND {where} "
+                                  f"ORDER BY feed_rowid LIMIT {SIGNAL_BATCH_ROWS}", conn, params=(last, *params))
+        if chunk.empty:
+            return
+        # The dtypes display_table frames have, so float32 bounds round the same way
+        yield compact_feed(chunk)
+        last = int(chunk['feed_rowid'].iloc[-1])
+
+def decide(cursor, chunk, decided):
+    """Insert the buys of chunk for each (signal_id, criteria, rowid floor) in decided."""
+    matrix = wallet_matrix(chunk, [criteria for _, criteria, _ in decided])
+    rowids = chunk['feed_rowid'].to_numpy()
+    for j, (signal_id, _, floor) in enumerate(decided):
+        buys = rowids[matrix[:, j] & (rowids > floor)].tolist()
+        cursor.executemany("INSERT OR IGNORE INTO wallet_signals (signal_id, feed_rowid) VALUES (?, ?)",
+                           [(signal_id, rowid) for rowid in buys])
+    return len(chunk) * len(decided)
+
+def sync_signals(conn, feed, wallets):
+    """Bring the signals of every wallet on one feed up to date; returns (new, redone) decisions.
+
+    Wallets new to the feed or with edited criteria are decided over the whole feed.
+    Otherwise only rows appended since the last sync are decided, plus the queued
+    rows whose MaxMcap or X's changed, for the wallets reading those. Wallets no
+    longer configured lose their signals. Targeted Feed is not applied, as when a
+    wallet is applied in display_table. The caller commits.
+    """
+    cursor = conn.cursor()
+    create_signal_tables(cursor)
+    view = f"{feed}_view"
+    columns = [col[0] for col in conn.execute(f"SELECT * FROM {view} LIMIT 0").description]
+    cursor.execute("SELECT wallet, signal_id, criteria_hash, evaluated_rowid FROM wallet_signal_state WHERE feed = ?", (feed,))
+    state = {wallet: (signal_id, digest, evaluated) for wallet, signal_id, digest, evaluated in cursor.fetchall()}
+    for wallet, (signal_id, digest, _) in state.items():
+        if wallet not in wallets or digest != criteria_hash(wallets[wallet]):
+            cursor.execute("DELETE FROM wallet_signals WHERE signal_id = ?", (signal_id,))
+            cursor.execute("DELETE FROM wallet_signal_state WHERE signal_id = ?", (signal_id,))
+    current = {}
+    for wallet, criteria in wallets.items():
+        signal_id, digest, evaluated = state.get(wallet, (None, None, 0))
+        if digest != criteria_hash(criteria):
+            cursor.execute("INSERT INTO wallet_signal_state (feed, wallet, criteria_hash, reads_enriched, evaluated_rowid) "
+                           "VALUES (?, ?, ?, ?, 0)", (feed, wallet, criteria_hash(criteria), int(reads_enriched(criteria))))
+            signal_id, evaluated = cursor.lastrowid, 0
+        current[wallet] = (signal_id, criteria, evaluated)
+    cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {feed}")
+    top = cursor.fetchone()[0]
+    # Only the columns some criterion reads are loaded; Funding is decided on FundingHours
+    keys = {key for criteria in wallets.values() for key in criteria if key in columns}
+    needed = [col for col in columns if col in keys or (col == 'FundingHours' and 'Funding' in keys)]
+    redone = 0
+    stale = [(signal_id, criteria, 0) for signal_id, criteria, evaluated in current.values()
+             if evaluated and reads_enriched(criteria)]
+    if stale:
+        queued = "feed_rowid IN (SELECT feed_rowid FROM wallet_signal_dirty WHERE feed = ?)"
+        for signal_id, _, _ in stale:
+            cursor.execute(f"DELETE FROM wallet_signals WHERE signal_id = ? AND {queued}", (signal_id, feed))
+        for chunk in signal_rows(conn, view, needed, queued, (feed,)):
+            redone += decide(cursor, chunk, stale)
+    cursor.execute("DELETE FROM wallet_signal_dirty WHERE feed = ?", (feed,))
+    pending = [entry for entry in current.values() if entry[2] < top]
+    new = 0
+    if pending:
+        # Each wallet only takes the rows past its own watermark
+        floor = min(evaluated for _, _, evaluated in pending)
+        for chunk in signal_rows(conn, view, needed, "feed_rowid <= ?", (top,), after=floor):
+            new += decide(cursor, chunk, pending)
+        cursor.executemany("UPDATE wallet_signal_state SET evaluated_rowid = ? WHERE signal_id = ?",
+                           [(top, signal_id) for signal_id, _, _ in pending])
+    return new, redone
+
+def signal_feeds(cursor):
+    """The feeds that have a view, which every feed gets from init_db."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='view' AND name LIKE '%\\_view' ESCAPE '\\'")
+    return [name[:-len('_view')] for (name,) in cursor.fetchall()]
+
+def sync_all_signals(conn, wallets=None, feeds=None):
+    """sync_signals over feeds (every feed by default) for wallets (wallets.json by default).
+
+    Returns {feed: (new, redone, seconds)}. Signals of feeds that no longer exist are
+    dropped when every feed is synced.
+    """
+    wallets = load_wallets() if wallets is None else wallets
+    cursor = conn.cursor()
+    create_signal_tables(cursor)
+    if feeds is None:
+        feeds = signal_feeds(cursor)
+        cursor.execute(f"SELECT signal_id FROM wallet_signal_state WHERE feed NOT IN ({', '.join('?' * len(feeds))})", feeds)
+        gone = cursor.fetchall()
+        cursor.executemany("DELETE FROM wallet_signals WHERE signal_id = ?", gone)
+        cursor.executemany("DELETE FROM wallet_signal_state WHERE signal_id = ?", gone)
+    results = {}
+    for feed in feeds:
+        start = time.perf_counter()
+        results[feed] = (*sync_signals(conn, feed, wallets), time.perf_counter() - start)
+    return results
+
+def signals_current(conn, feed, wallets, names):
+    """Whether the stored signals of the wallets in names already cover every row of feed.
+
+    Only reads: a wallet is current when it is stored under its criteria hash up to
+    the feed's last rowid and, if it reads MaxMcap or X's, no rows are queued dirty.
+    """
+    try:
+        rows = conn.execute("SELECT wallet, criteria_hash, evaluated_rowid FROM wallet_signal_state WHERE feed = ?", (feed,))
+        state = {wallet: (digest, evaluated) for wallet, digest, evaluated in rows}
+        dirty = conn.execute("SELECT 1 FROM wallet_signal_dirty WHERE feed = ? LIMIT 1", (feed,)).fetchone()
+    except sqlite3.OperationalError:
+        return False  # no signal tables yet
+    (top,) = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {feed}").fetchone()
+    for name in names:
+        digest, evaluated = state.get(name, (None, 0))
+        if digest != criteria_hash(wallets[name]) or evaluated < top or (dirty and reads_enriched(wallets[name])):
+            return False
+    return True
+
+def signal_matrix(conn, feed, wallets, names, rowids):
+    """Boolean (row x wallet) buy matrix of the feed rows rowids for the wallets in names.
+
+    conn is only read. When the stored signals are stale they are synced first on a
+    short-lived connection of its own, which gives up after SYNC_TIMEOUT seconds
+    (sqlite3.OperationalError) if an ingest holds data.db, so the caller can decide
+    in memory instead of stalling. Each wallet's buys are then read off the
+    wallet_signals key and looked up in rowids. The buys come back as one
+    group_concat string per wallet, which numpy parses several times faster than
+    fetchall() builds a tuple per row.
+    """
+    if not signals_current(conn, feed, wallets, names):
+        path = conn.execute("PRAGMA database_list").fetchone()[2]
+        writer = sqlite3.connect(path, timeout=SYNC_TIMEOUT)
+        try:
+            sync_signals(writer, feed, wallets)
+            writer.commit()
+        finally:
+            writer.close()  # rolls back a sync the lock interrupted
+    positions = pd.Index(rowids)
+    matrix = np.zeros((len(positions), len(names)), dtype=bool)
+    for j, name in enumerate(names):
+        (buys,) = conn.execute("""SELECT group_concat(s.feed_rowid) FROM wallet_signal_state w
+                                  JOIN wallet_signals s USING (signal_id) WHERE w.feed = ? AND w.wallet = ?""",
+                               (feed, name)).fetchone()
+        if buys:
+            found = positions.get_indexer(np.fromstring(buys, dtype=np.int64, sep=','))
+            matrix[found[found >= 0], j] = True
+    return matrix
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Decide every wallet in wallets.json on the feed rows not yet decided.")
+    parser.add_argument('--feed', action='append', help="Only this feed (repeatable; default every feed)")
+    parser.add_argument('--rebuild', action='store_true', help="Drop every stored signal and decide all rows again")
+    args = parser.parse_args()
+    conn = sqlite3.connect(os.path.join(DATA_DIRECTORY, 'data.db'))
+    if args.rebuild:
+        for table in SIGNAL_TABLES:
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+    for feed, (new, redone, seconds) in sync_all_signals(conn, feeds=args.feed).items():
+        print(f"{feed}: {new} new and {redone} re-enriched row decisions in {seconds:.2f}s")
+    conn.commit()
+    conn.close()